@@ -0,0 +1,70 @@
+"""
+Accuracy and throughput of appointment extraction on the golden confirmation corpus
+
+Run from the repository root:
+    python benchmarks/appointment_extraction_benchmark.py [--iterations N]
+Exits non-zero when any corpus sentence is extracted differently from its expected values.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calls.appointment_extraction import extract_appointment  # noqa: E402
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "appointment_extraction_corpus.jsonl")
+CHECKED_FIELDS = ("appointment_date", "appointment_time")
+
+
+def load_corpus(filename=CORPUS_FILE):
+    """Corpus entries: text, the call's date and the expected extraction"""
+    with open(filename, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def check_accuracy(corpus):
+    """Entries whose extraction differs from the expected fields"""
+    mismatches = []
+    for entry in corpus:
+        extracted = extract_appointment(entry["text"], date.fromisoformat(entry["today"]))
+        wrong = {field: (entry[field], extracted[field]) for field in CHECKED_FIELDS if extracted[field] != entry[field]}
+        if wrong:
+            mismatches.append((entry["text"], wrong))
+    return mismatches
+
+
+def measure_throughput(corpus, iterations):
+    """Sentences extracted per second"""
+    samples = [(entry["text"], date.fromisoformat(entry["today"])) for entry in corpus]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text, today in samples:
+            extract_appointment(text, today)
+    elapsed = time.perf_counter() - started
+    return len(samples) * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500, help="passes over the corpus for the timing run")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    mismatches = check_accuracy(corpus)
+    for text, wrong in mismatches:
+        print(f"❌ {text}")
+        for field, (expected, extracted) in wrong.items():
+            print(f"   {field}: expected {expected!r}, got {extracted!r}")
+
+    correct = len(corpus) - len(mismatches)
+    print(f"🎯 Accuracy: {correct}/{len(corpus)} sentences ({correct / len(corpus):.1%})")
+    print(f"⚡ Throughput: {measure_throughput(corpus, args.iterations):,.0f} sentences/s")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
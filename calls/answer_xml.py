@@ -0,0 +1,103 @@
+"""
+Pre-rendered Plivo XML for the answer, incoming-call and language-switch routes
+"""
+from functools import lru_cache
+from typing import Tuple
+from xml.sax.saxutils import escape
+
+from plivo import plivoxml
+
+from settings import settings
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+EXTRA_HEADERS_PLACEHOLDER = "__EXTRA_HEADERS__"
+HINDI_LANGUAGE = "hi-IN"
+HINDI_DIGIT = "5"
+
+VOICE_GREETINGS = {
+    HINDI_LANGUAGE: "नमस्ते, मैं आपकी कैसे मदद कर सकती हूँ?",
+}
+DEFAULT_VOICE_GREETING = "Hello, How can I help you today?"
+
+
+def _split_template(xml: str) -> Tuple[str, str]:
+    """Split rendered XML around the extraHeaders placeholder"""
+    prefix, suffix = xml.split(EXTRA_HEADERS_PLACEHOLDER)
+    return prefix, suffix
+
+
+def _fill_template(template: Tuple[str, str], extra_headers: str) -> str:
+    return template[0] + escape(extra_headers, {'"': "&quot;"}) + template[1]
+
+
+@lru_cache(maxsize=None)
+def _answer_template() -> Tuple[str, str]:
+    return _split_template(f'''<?xml version="1.0" encoding="UTF-8"?>
+    <Response>
+        <Speak>Please wait while we connect your call to the {settings.SERVICE_CENTER_NAME} AI Agent. OK you can start speaking.</Speak>
+        <Stream streamTimeout="86400" keepCallAlive="true" bidirectional="true" contentType="audio/x-mulaw;rate=8000" audioTrack="inbound" extraHeaders="{EXTRA_HEADERS_PLACEHOLDER}" >
+            {settings.HOST_URL}/media-stream
+        </Stream>
+    </Response>
+    ''')
+
+
+def answer_xml(extra_headers: str) -> str:
+    """Answer XML for dialer calls, only the stream's extraHeaders differ per call"""
+    return _fill_template(_answer_template(), extra_headers)
+
+
+@lru_cache(maxsize=None)
+def incoming_call_xml(language: str) -> str:
+    """Language selection prompt for inbound calls"""
+    http_host = settings.HOST_URL.replace('wss://', 'https://')
+
+    response = plivoxml.ResponseElement()
+
+    get_input = plivoxml.GetInputElement() \
+        .set_action(f"{http_host}/voice") \
+        .set_method("POST") \
+        .set_input_type("dtmf") \
+        .set_redirect(True) \
+        .set_language(language) \
+        .set_num_digits(1)
+
+    get_input.add_speak(
+        content="To switch to Hindi, please press 5. To continue in English, press any other key.",
+        voice="Polly.Salli",
+        language=language
+    )
+
+    response.add(get_input)
+    response.add_speak(
+        content="No selection received. Continuing in English.",
+        voice="Polly.Salli",
+        language=language
+    )
+
+    return XML_DECLARATION + response.to_string()
+
+
+def voice_language(digits: str) -> str:
+    """Conversation language picked on the inbound prompt"""
+    return HINDI_LANGUAGE if digits == HINDI_DIGIT else settings.SECONDARY_LANGUAGE
+
+
+@lru_cache(maxsize=None)
+def _voice_template(lang_code: str) -> Tuple[str, str]:
+    response = plivoxml.ResponseElement()
+    response.add(plivoxml.SpeakElement(VOICE_GREETINGS.get(lang_code, DEFAULT_VOICE_GREETING), language=lang_code))
+    response.add(plivoxml.StreamElement(f'{settings.HOST_URL}/media-stream',
+                                        extraHeaders=EXTRA_HEADERS_PLACEHOLDER,
+                                        bidirectional=True,
+                                        streamTimeout=86400,
+                                        keepCallAlive=True,
+                                        contentType="audio/x-mulaw;rate=8000",
+                                        audioTrack="inbound"
+                                        ))
+    return _split_template(XML_DECLARATION + response.to_string())
+
+
+def voice_xml(lang_code: str, extra_headers: str) -> str:
+    """Greeting and media stream XML for the chosen language"""
+    return _fill_template(_voice_template(lang_code), extra_headers)
@@ -0,0 +1,179 @@
+"""
+Appointment date and time extraction from confirmation transcripts
+"""
+import re
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+APPOINTMENT_SLOT_MINUTES = 60  # Length of the range returned for a specific time
+
+MONTHS = {
+    "jan": 1, "january": 1, "जनवरी": 1,
+    "feb": 2, "february": 2, "फरवरी": 2, "फ़रवरी": 2,
+    "mar": 3, "march": 3, "मार्च": 3,
+    "apr": 4, "april": 4, "अप्रैल": 4,
+    "may": 5, "मई": 5,
+    "jun": 6, "june": 6, "जून": 6,
+    "jul": 7, "july": 7, "जुलाई": 7,
+    "aug": 8, "august": 8, "अगस्त": 8,
+    "sep": 9, "sept": 9, "september": 9, "सितंबर": 9, "सितम्बर": 9,
+    "oct": 10, "october": 10, "अक्टूबर": 10,
+    "nov": 11, "november": 11, "नवंबर": 11, "नवम्बर": 11,
+    "dec": 12, "december": 12, "दिसंबर": 12, "दिसम्बर": 12,
+}
+
+RELATIVE_DAYS = {"आज": 0, "today": 0, "कल": 1, "tomorrow": 1, "परसों": 2, "day after tomorrow": 2}
+
+# Day part -> (slot label, default range, offset added to 1-11 o'clock hours)
+DAY_PARTS = {
+    "सुबह": ("सुबह (Morning)", (9, 12), 0), "morning": ("सुबह (Morning)", (9, 12), 0),
+    "दोपहर": ("दोपहर (Afternoon)", (12, 16), 12), "afternoon": ("दोपहर (Afternoon)", (12, 16), 12),
+    "शाम": ("शाम (Evening)", (16, 20), 12), "evening": ("शाम (Evening)", (16, 20), 12),
+    "रात": ("रात (Night)", (20, 22), 12), "night": ("रात (Night)", (20, 22), 12),
+}
+
+HALF_HOUR_WORDS = {"साढ़े": 30, "सवा": 15, "पौने": -15}
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# Letters, digits and Devanagari signs may not touch a word on either side
+_START = r"(?<![\wऀ-ॿ])"
+_END = r"(?![\wऀ-ॿ])"
+
+_NUMERIC_FORMS = rf"""
+      (?P<dmy>(?P<dmy_d>\d{{1,2}})[-/.](?P<dmy_m>\d{{1,2}})[-/.](?P<dmy_y>\d{{4}}))
+    | (?P<ymd>(?P<ymd_y>\d{{4}})[-/.](?P<ymd_m>\d{{1,2}})[-/.](?P<ymd_d>\d{{1,2}}))
+    | (?P<dm>(?P<dm_d>\d{{1,2}})(?:st|nd|rd|th)?\s*(?P<dm_m>{_alternation(MONTHS)}){_END}(?:,?\s*(?P<dm_y>\d{{4}}))?)
+    | (?P<clock>(?P<clock_h>\d{{1,2}})[:.](?P<clock_m>\d{{2}})(?:\s*(?P<clock_ampm>[ap])\.?m\.?{_END})?(?:\s*बजे)?)
+    | (?P<hour>(?P<hour_h>\d{{1,2}})\s*(?:(?P<hour_ampm>[ap])\.?m\.?{_END}|बजे))
+"""
+_WORD_FORMS = rf"""
+      (?P<rel>{_START}(?:{_alternation(RELATIVE_DAYS)}){_END})
+    | (?P<frac_hour>(?P<frac>{_alternation(HALF_HOUR_WORDS)})\s*(?P<frac_hour_h>\d{{1,2}})\s*
+        (?:(?P<frac_hour_ampm>[ap])\.?m\.?{_END}|बजे))
+    | (?P<part>{_START}(?:{_alternation(DAY_PARTS)}){_END})
+"""
+_WORD_INITIALS = "".join(sorted({case(word[0]) for word in (*RELATIVE_DAYS, *HALF_HOUR_WORDS, *DAY_PARTS)
+                                 for case in (str.lower, str.upper)}))
+
+# Every date and time form in one pattern, so a transcript is scanned once.  Each
+# branch is guarded by the characters it can start with, which lets the scan step
+# over ordinary words without trying every form at every position.
+APPOINTMENT_PATTERN = re.compile(
+    rf"(?=\d)(?:{_NUMERIC_FORMS})|(?=[{_WORD_INITIALS}])(?:{_WORD_FORMS})",
+    re.IGNORECASE | re.VERBOSE)
+DATE_KINDS = ("dmy", "ymd", "dm", "rel")
+TIME_KINDS = ("clock", "hour", "frac_hour")
+
+
+def _valid_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _resolve_date(match: "re.Match", today: date) -> Optional[date]:
+    kind = match.lastgroup
+    if kind == "dmy":
+        return _valid_date(int(match.group("dmy_y")), int(match.group("dmy_m")), int(match.group("dmy_d")))
+    if kind == "ymd":
+        return _valid_date(int(match.group("ymd_y")), int(match.group("ymd_m")), int(match.group("ymd_d")))
+    if kind == "dm":
+        day, month = int(match.group("dm_d")), MONTHS[match.group("dm_m").lower()]
+        if match.group("dm_y"):
+            return _valid_date(int(match.group("dm_y")), month, day)
+        resolved = _valid_date(today.year, month, day)
+        if resolved and resolved < today:  # "5 January" said in December is next year
+            resolved = _valid_date(today.year + 1, month, day)
+        return resolved
+    return today + timedelta(days=RELATIVE_DAYS[match.group("rel").lower()])
+
+
+def _resolve_time(match: "re.Match", day_part: Optional[str]) -> Optional[int]:
+    """Minutes after midnight for a clock or o'clock match"""
+    kind = match.lastgroup
+    if kind == "clock":
+        hour, minute, ampm = int(match.group("clock_h")), int(match.group("clock_m")), match.group("clock_ampm")
+    elif kind == "hour":
+        hour, minute, ampm = int(match.group("hour_h")), 0, match.group("hour_ampm")
+    else:
+        hour, minute = int(match.group("frac_hour_h")), HALF_HOUR_WORDS[match.group("frac")]
+        ampm = match.group("frac_hour_ampm")
+    if hour > 23 or minute > 59:
+        return None
+
+    if ampm:
+        hour = hour % 12 + (12 if ampm.lower() == "p" else 0)
+    elif day_part and hour < 12:
+        hour += DAY_PARTS[day_part][2]
+    elif 1 <= hour <= 7:
+        hour += 12  # "3 बजे" at a service center means the afternoon
+    return (hour * 60 + minute) % (24 * 60)
+
+
+def _slot_for_hour(hour: int) -> str:
+    for label, (start, end), _ in DAY_PARTS.values():
+        if start <= hour < end:
+            return label
+    return DAY_PARTS["सुबह"][0] if hour < 12 else DAY_PARTS["रात"][0]
+
+
+def _format_range(start: int, end: int) -> str:
+    return f"{start // 60:02d}:{start % 60:02d}-{end // 60 % 24:02d}:{end % 60:02d}"
+
+
+def mentions_date_and_time(text: str) -> bool:
+    """Whether text names both a date and a time or day part"""
+    kinds = set()
+    for match in APPOINTMENT_PATTERN.finditer(text):
+        kinds.add("date" if match.lastgroup in DATE_KINDS else "time")
+        if len(kinds) == 2:
+            return True
+    return False
+
+
+def extract_appointment(text: str, today: Optional[date] = None) -> Dict[str, Optional[str]]:
+    """
+    Date and time of an appointment in one pass over text.
+
+    Returns the ISO date, a 24h "HH:MM-HH:MM" range, the day-part label and the
+    matched source text; fields that could not be found are None.
+    """
+    today = today or date.today()
+    date_match: Optional["re.Match"] = None
+    time_match: Optional["re.Match"] = None
+    day_part: Optional[str] = None
+
+    for match in APPOINTMENT_PATTERN.finditer(text):
+        kind = match.lastgroup  # The enclosing alternative closes last
+        if kind in DATE_KINDS:
+            date_match = date_match or match
+        elif kind in TIME_KINDS:
+            time_match = time_match or match
+        elif day_part is None:
+            day_part = match.group("part").lower()
+        if date_match and time_match and day_part:
+            break
+
+    appointment_date = _resolve_date(date_match, today) if date_match else None
+    start: Optional[int] = _resolve_time(time_match, day_part) if time_match else None
+    if start is not None:
+        time_range: Optional[Tuple[int, int]] = (start, start + APPOINTMENT_SLOT_MINUTES)
+        time_slot = DAY_PARTS[day_part][0] if day_part else _slot_for_hour(start // 60)
+    elif day_part:
+        time_range = tuple(hour * 60 for hour in DAY_PARTS[day_part][1])
+        time_slot = DAY_PARTS[day_part][0]
+    else:
+        time_range, time_slot = None, None
+
+    return {
+        "appointment_date": appointment_date.isoformat() if appointment_date else None,
+        "appointment_time": _format_range(*time_range) if time_range else None,
+        "time_slot": time_slot,
+        "date_text": date_match.group(0).strip() if date_match else None,
+        "time_text": time_match.group(0).strip() if time_match else day_part,
+    }
@@ -0,0 +1,281 @@
+"""
+Single-writer appointment sink - journals bookings, then appends them to the workbook in batches
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.packaging.custom import IntProperty
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_HEADERS = [
+    "Customer Name",
+    "Phone Number",
+    "Car Model",
+    "Service Type",
+    "Appointment Date",
+    "Appointment Time",
+    "Address",
+]
+JOURNAL_SEQ_PROPERTY = "journal_seq"  # Workbook property: last journal entry written to the sheet
+_STOP = object()  # Queued by stop() after the last booking
+
+
+class AppointmentWorkbookSink:
+    """
+    The only writer of the appointments workbook.
+
+    record() returns once the booking is in an append-only journal (fsynced JSON
+    lines, one sequence number each).  A background task then appends journaled
+    rows to the workbook in batches, when batch_size rows are waiting or
+    flush_interval seconds after the oldest one, replacing the workbook
+    atomically.  The workbook is parsed once by start() and kept in memory, so a
+    batch only appends its rows and saves; if the file changed on disk since the
+    last save (e.g. the service team edited it in Excel) it is re-read first, so
+    those edits are kept.  The workbook remembers the last
+    sequence number it holds, so start() appends whatever a crash left
+    unwritten.  Once every journaled row has been saved the journal is emptied,
+    so it only ever holds the rows the workbook may be missing; an unreadable
+    workbook is set aside as .corrupt and a new one started from those rows.
+    A failed workbook write (e.g. the file is open in Excel) keeps the rows for
+    the next batch.
+    """
+
+    def __init__(self, workbook_file: str, journal_file: str, batch_size: int = 20, flush_interval: float = 5):
+        self.workbook_file = workbook_file
+        self.journal_file = journal_file
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: List[Tuple[int, List[str]]] = []  # Journaled, not yet in the workbook
+        self._next_seq = 1
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._workbook: Optional[Workbook] = None  # Owned by the writer, used only in the executor
+        self._workbook_seq = 0  # Last journal entry appended to the in-memory workbook
+        self._workbook_stat: Optional[Tuple[int, int]] = None  # (mtime_ns, size) when last read or saved
+
+        # Counters
+        self.journaled = 0
+        self.written = 0
+        self.batches = 0
+        self.write_failures = 0
+        self.recovered = 0
+
+    async def start(self):
+        """Recover unwritten rows from the journal and start the writer"""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._recover)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Journal everything queued, write the last batch and stop the writer"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._queue.put_nowait(_STOP)
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def record(self, row: List[str]):
+        """Queue a booking row; returns once it is durable in the journal"""
+        if self._task is None or self._task.done() or self._stopping:
+            raise RuntimeError("appointment sink is not running")
+        journaled = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, journaled))
+        await journaled
+
+    # Writer task
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                items = [await asyncio.wait_for(self._queue.get(), timeout)]
+            except asyncio.TimeoutError:
+                items = []
+            while not self._queue.empty():  # Journal everything that arrived together
+                items.append(self._queue.get_nowait())
+
+            stopping = _STOP in items
+            await self._journal([item for item in items if item is not _STOP])
+            if self._pending and deadline is None:
+                deadline = loop.time() + self.flush_interval
+
+            if self._pending and (stopping or len(self._pending) >= self.batch_size or loop.time() >= deadline):
+                await self._write_pending()
+                deadline = loop.time() + self.flush_interval if self._pending else None
+
+    async def _journal(self, items: List[Tuple[List[str], asyncio.Future]]):
+        if not items:
+            return
+
+        entries = [(self._next_seq + index, row) for index, (row, _) in enumerate(items)]
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._append_journal, entries)
+        except Exception as e:
+            logger.error(f"❌ Failed to journal {len(items)} appointments: {e}")
+            for _, journaled in items:
+                if not journaled.done():
+                    journaled.set_exception(e)
+            return
+
+        self._next_seq += len(entries)
+        self._pending.extend(entries)
+        self.journaled += len(entries)
+        for _, journaled in items:
+            if not journaled.done():
+                journaled.set_result(None)
+
+    async def _write_pending(self):
+        if not self._pending:
+            return
+        batch = list(self._pending)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._append_to_workbook, batch)
+        except Exception as e:
+            self.write_failures += 1
+            logger.warning(f"⚠️ Failed to write {len(batch)} appointments to {self.workbook_file}, "
+                           f"will retry: {e}")
+            return
+        del self._pending[:len(batch)]
+        self.written += len(batch)
+        self.batches += 1
+        logger.info(f"📊 Wrote {len(batch)} appointments to {self.workbook_file}")
+        if not self._pending:
+            try:
+                await loop.run_in_executor(None, self._compact_journal)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to compact {self.journal_file}: {e}")
+
+    # File I/O, run in the executor
+    def _append_journal(self, entries: List[Tuple[int, List[str]]]):
+        with open(self.journal_file, "a", encoding="utf-8") as journal:
+            for seq, row in entries:
+                journal.write(json.dumps({"seq": seq, "row": row}, ensure_ascii=False) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _read_journal(self) -> List[Tuple[int, List[str]]]:
+        entries = []
+        if not os.path.exists(self.journal_file):
+            return entries
+        with open(self.journal_file, "rb+") as journal:
+            data = journal.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # An entry cut short by a crash was never acknowledged; drop it so new entries start on a fresh line
+                logger.warning(f"⚠️ Dropping incomplete last entry of {self.journal_file}")
+                journal.truncate(complete)
+
+        for line_number, line in enumerate(data[:complete].decode("utf-8").splitlines(), 1):
+            try:
+                entry = json.loads(line)
+                entries.append((int(entry["seq"]), list(entry["row"])))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"⚠️ Skipping unreadable line {line_number} of {self.journal_file}")
+        return entries
+
+    def _stat_workbook(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.workbook_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _load_workbook(self) -> Tuple[Workbook, int]:
+        """The workbook and the last journal entry it holds; a new one if there is none"""
+        if os.path.exists(self.workbook_file):
+            wb = openpyxl.load_workbook(self.workbook_file)
+            props = wb.custom_doc_props
+            return wb, int(props[JOURNAL_SEQ_PROPERTY].value) if JOURNAL_SEQ_PROPERTY in props.names else 0
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Service Appointments"
+        ws.append(APPOINTMENT_HEADERS)
+        return wb, 0
+
+    def _append_to_workbook(self, entries: List[Tuple[int, List[str]]]):
+        stat = self._stat_workbook()
+        if stat != self._workbook_stat:
+            # Changed outside the server since we last saved; build on the file, not our copy
+            logger.info(f"📂 {self.workbook_file} changed on disk, re-reading it before appending")
+            self._workbook, self._workbook_seq = self._load_workbook()
+            self._workbook_stat = stat
+        wb = self._workbook
+        ws = wb.active
+        for seq, row in entries:
+            if seq > self._workbook_seq:  # Already there after a crash, or a save that failed
+                ws.append(row)
+                self._workbook_seq = seq
+        props = wb.custom_doc_props
+        if JOURNAL_SEQ_PROPERTY in props.names:
+            props[JOURNAL_SEQ_PROPERTY].value = self._workbook_seq
+        else:
+            props.append(IntProperty(name=JOURNAL_SEQ_PROPERTY, value=self._workbook_seq))
+
+        temp_file = f"{self.workbook_file}.tmp"
+        wb.save(temp_file)
+        os.replace(temp_file, self.workbook_file)
+        self._workbook_stat = self._stat_workbook()
+
+    def _compact_journal(self):
+        """Empty the journal; every entry in it is saved in the workbook"""
+        with open(self.journal_file, "r+b") as journal:
+            journal.truncate(0)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _recover(self):
+        entries = self._read_journal()
+
+        try:
+            self._workbook, written_seq = self._load_workbook()
+        except Exception as e:
+            corrupt_file = f"{self.workbook_file}.corrupt"
+            logger.error(f"❌ Unreadable {self.workbook_file} ({e}), moved to {corrupt_file}; starting a new workbook")
+            os.replace(self.workbook_file, corrupt_file)
+            self._workbook, written_seq = self._load_workbook()
+        self._workbook_seq = written_seq
+        self._workbook_stat = self._stat_workbook()
+        # A compacted journal restarts empty; keep numbering after what the workbook holds
+        self._next_seq = max(written_seq, entries[-1][0] if entries else 0) + 1
+
+        self._pending = [(seq, row) for seq, row in entries if seq > written_seq]
+        if self._pending:
+            self.recovered = len(self._pending)
+            logger.info(f"♻️ Recovering {self.recovered} journaled appointments into {self.workbook_file}")
+            try:
+                self._append_to_workbook(self._pending)
+                self.written += len(self._pending)
+                self._pending = []
+                self._compact_journal()
+            except Exception as e:
+                self.write_failures += 1
+                logger.warning(f"⚠️ Recovery write to {self.workbook_file} failed, will retry: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Journal and workbook counters for monitoring"""
+        return {
+            "queued": self._queue.qsize(),
+            "pending_rows": len(self._pending),
+            "journaled": self.journaled,
+            "written": self.written,
+            "batches": self.batches,
+            "write_failures": self.write_failures,
+            "recovered": self.recovered,
+        }
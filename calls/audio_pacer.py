@@ -0,0 +1,211 @@
+"""
+Paced outbound audio - coalesces realtime API deltas into fixed Plivo frames
+"""
+import asyncio
+import base64
+import json
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from .media_frames import play_audio_frame
+
+logger = logging.getLogger(__name__)
+
+MULAW_BYTES_PER_MS = 8  # 8 kHz, one byte per sample
+BASE64_GROUP_BYTES = 3  # Encoded as one group of four base64 characters
+MARK_NAME_PREFIX = "audio_"
+
+
+class OutboundAudioPacer:
+    """
+    Buffers one call's outbound mu-law audio and plays it out in fixed frames.
+
+    Deltas from the realtime API arrive in irregular sizes and faster than real
+    time.  They are kept as base64 text, and a pacing task sends frame_ms frames
+    to Plivo no more than lead_ms ahead of the playback clock, with one mark
+    after every frames_per_mark frames instead of one per delta.  Frames are a
+    whole number of 3-byte groups, so they are cut from the text on 4-character
+    boundaries and spliced into playAudio without decoding; only padded deltas
+    (and pre-rendered audio) are decoded and re-encoded to realign the text.
+
+    Because every byte sent is accounted against that clock, item_played_ms()
+    knows how much of the current assistant item the caller has actually heard,
+    which is what conversation.item.truncate needs on barge-in.
+    """
+
+    def __init__(self, send_text: Callable[[str], Awaitable[None]], stream_id: Optional[str],
+                 frame_ms: int = 100, lead_ms: int = 300, frames_per_mark: int = 5):
+        self.send_text = send_text
+        self.stream_id = stream_id
+        # Rounded up to whole base64 groups: 801 bytes (1068 characters) for 100 ms
+        groups = -(-frame_ms * MULAW_BYTES_PER_MS // BASE64_GROUP_BYTES)
+        self.frame_bytes = groups * BASE64_GROUP_BYTES
+        self.frame_chars = self.frame_bytes // BASE64_GROUP_BYTES * 4
+        self.lead = lead_ms / 1000
+        self.frames_per_mark = frames_per_mark
+
+        self._buffer = bytearray()  # Unpadded base64 text of whole 3-byte groups
+        self._tail = b""  # Up to 2 decoded bytes still short of a whole group
+        self._data_ready = asyncio.Event()
+        self._flush_requested = False
+        self._generation = 0  # Bumped by clear() so frames taken before it are dropped
+        self._task: Optional[asyncio.Task] = None
+
+        self._enqueued_bytes = 0  # All audio accepted for the call
+        self._sent_bytes = 0  # All audio handed to Plivo
+        self._playback_end = 0.0  # Loop time at which Plivo runs out of audio
+        self._frames_since_mark = 0
+        self.pending_marks: Deque[str] = deque()
+
+        self.item_id: Optional[str] = None
+        self._item_start_bytes = 0  # _enqueued_bytes when item_id's first delta arrived
+
+        # Counters
+        self.deltas_received = 0
+        self.frames_sent = 0
+        self.marks_sent = 0
+
+    def start(self):
+        """Start the pacing task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the pacing task, dropping unsent audio"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def push(self, delta: str, item_id: Optional[str] = None):
+        """Queue a base64 mu-law delta for playback, as text when it keeps the buffer aligned"""
+        if not self._tail and len(delta) % 4 == 0 and not delta.endswith("="):
+            self._queue_text(delta.encode("ascii"), len(delta) // 4 * BASE64_GROUP_BYTES, item_id)
+        else:
+            self.push_audio(base64.b64decode(delta), item_id)
+
+    def push_audio(self, audio: bytes, item_id: Optional[str] = None):
+        """Queue raw mu-law audio for playback"""
+        data = self._tail + audio
+        aligned = len(data) - len(data) % BASE64_GROUP_BYTES
+        self._tail = data[aligned:]
+        self._queue_text(base64.b64encode(data[:aligned]), len(audio), item_id)
+
+    def _queue_text(self, text: bytes, audio_bytes: int, item_id: Optional[str]):
+        if item_id and item_id != self.item_id:
+            self.item_id = item_id
+            self._item_start_bytes = self._enqueued_bytes
+        self._buffer += text
+        self._enqueued_bytes += audio_bytes
+        self.deltas_received += 1
+        if len(self._buffer) >= self.frame_chars:
+            self._data_ready.set()
+
+    def flush(self):
+        """Send the buffered tail as a short frame once the response audio is done"""
+        self._flush_requested = True
+        if self._buffer or self._tail:
+            self._data_ready.set()
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def played_bytes(self) -> int:
+        """Audio the caller has heard so far, by the playback clock"""
+        unplayed = max(0.0, self._playback_end - self._now()) * 1000 * MULAW_BYTES_PER_MS
+        return max(0, self._sent_bytes - int(unplayed))
+
+    def item_played_ms(self) -> int:
+        """Milliseconds of the current assistant item that have been played"""
+        return max(0, self.played_bytes() - self._item_start_bytes) // MULAW_BYTES_PER_MS
+
+    def is_playing(self) -> bool:
+        """Whether audio is still buffered here or waiting to be played by Plivo"""
+        return bool(self._buffer or self._tail) or self._playback_end > self._now()
+
+    def clear(self) -> int:
+        """Drop unplayed audio on barge-in; returns how much of the item had been played"""
+        played_ms = self.item_played_ms()
+        played_bytes = self.played_bytes()
+        self._generation += 1
+        self._buffer.clear()
+        self._tail = b""
+        self._data_ready.clear()
+        self._flush_requested = False
+        self._frames_since_mark = 0
+        self.pending_marks.clear()
+        self._sent_bytes = self._enqueued_bytes = played_bytes
+        self._playback_end = self._now()
+        self.item_id = None
+        return played_ms
+
+    def on_mark(self, name: Optional[str]):
+        """Plivo has played everything up to this mark"""
+        if name in self.pending_marks:
+            while self.pending_marks and self.pending_marks.popleft() != name:
+                pass
+
+    async def _run(self):
+        try:
+            while True:
+                await self._data_ready.wait()
+                if len(self._buffer) >= self.frame_chars:
+                    frame = self._buffer[:self.frame_chars].decode("ascii")
+                    frame_bytes = self.frame_bytes
+                    del self._buffer[:self.frame_chars]
+                elif self._flush_requested and (self._buffer or self._tail):
+                    frame = (self._buffer + base64.b64encode(self._tail)).decode("ascii")
+                    frame_bytes = len(self._buffer) // 4 * BASE64_GROUP_BYTES + len(self._tail)
+                    self._buffer.clear()
+                    self._tail = b""
+                else:
+                    self._data_ready.clear()
+                    if self._flush_requested:
+                        self._flush_requested = False
+                        await self._send_mark()
+                    continue
+                generation = self._generation
+
+                now = self._now()
+                if self._playback_end < now:
+                    self._playback_end = now  # Plivo ran dry, playback restarts with this frame
+                ahead = self._playback_end - now
+                if ahead > self.lead:
+                    await asyncio.sleep(ahead - self.lead)
+                    if generation != self._generation:
+                        continue  # Cleared while waiting
+
+                await self.send_text(play_audio_frame(frame))
+                self._sent_bytes += frame_bytes
+                self._playback_end += frame_bytes / (1000 * MULAW_BYTES_PER_MS)
+                self.frames_sent += 1
+                self._frames_since_mark += 1
+                if self._frames_since_mark >= self.frames_per_mark:
+                    await self._send_mark()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Outbound audio pacer stopped: {e}")
+
+    async def _send_mark(self):
+        if not self.stream_id or not self._frames_since_mark:
+            return
+        name = f"{MARK_NAME_PREFIX}{self._sent_bytes // MULAW_BYTES_PER_MS}"
+        await self.send_text(json.dumps({
+            "event": "mark",
+            "streamSid": self.stream_id,
+            "mark": {"name": name}
+        }))
+        self.pending_marks.append(name)
+        self._frames_since_mark = 0
+        self.marks_sent += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Per-call pacing counters"""
+        return {
+            "deltas_received": self.deltas_received,
+            "frames_sent": self.frames_sent,
+            "marks_sent": self.marks_sent,
+            "played_ms": self.played_bytes() // MULAW_BYTES_PER_MS,
+        }
@@ -0,0 +1,67 @@
+"""
+Streaming detection of appointment confirmations in the AI's transcript
+"""
+from typing import Dict, Optional
+
+from .appointment_extraction import mentions_date_and_time
+
+BOOKING_CONFIRMATION_PHRASE = "बुक कर दी है"
+
+
+class _ItemTranscript:
+    __slots__ = ("text", "scan_from", "phrase_seen", "fired")
+
+    def __init__(self):
+        self.text = ""
+        self.scan_from = 0  # Where the next phrase search starts
+        self.phrase_seen = False
+        self.fired = False
+
+
+class BookingConfirmationDetector:
+    """
+    Spots the booking confirmation phrase while one call's AI transcript streams in.
+
+    feed() takes response.audio_transcript.delta text per assistant item.  The
+    phrase search restarts just far enough back to catch a phrase split across
+    deltas, and once the phrase is there the confirmation fires as soon as a
+    date and a time token have also appeared, instead of waiting for the whole
+    response.  complete() handles the final transcript and fires for a
+    confirmation feed() did not, so each item fires at most once.
+    """
+
+    def __init__(self, phrase: str = BOOKING_CONFIRMATION_PHRASE):
+        self.phrase = phrase
+        self._items: Dict[str, _ItemTranscript] = {}
+
+        # Counters
+        self.streamed_detections = 0
+        self.completed_detections = 0
+
+    def feed(self, item_id: str, delta: str) -> Optional[str]:
+        """Add transcript text; returns the transcript so far the first time it is a full confirmation"""
+        item = self._items.get(item_id)
+        if item is None:
+            item = self._items[item_id] = _ItemTranscript()
+        if item.fired or not delta:
+            return None
+
+        item.text += delta
+        if not item.phrase_seen:
+            item.phrase_seen = item.text.find(self.phrase, item.scan_from) >= 0
+            item.scan_from = max(0, len(item.text) - len(self.phrase) + 1)
+        if item.phrase_seen and mentions_date_and_time(item.text):
+            item.fired = True
+            self.streamed_detections += 1
+            return item.text
+        return None
+
+    def complete(self, item_id: Optional[str], transcript: str) -> Optional[str]:
+        """Final transcript of an item; returns it if it confirms a booking that was not already detected"""
+        item = self._items.pop(item_id, None) if item_id else None
+        if item is not None and item.fired:
+            return None
+        if self.phrase in transcript:
+            self.completed_detections += 1
+            return transcript
+        return None
@@ -0,0 +1,47 @@
+"""
+Per-call context shared by the dialer, the answer webhook and the media stream
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database.models import CallSession
+
+UNKNOWN_CUSTOMER = {"name": "Unknown Customer", "phone_number": "Unknown", "car_model": "Unknown"}
+
+
+class CallContext:
+    """Everything one call needs to know about its customer and its progress"""
+
+    def __init__(self, customer_record: Optional[Dict[str, Any]], service_type: Optional[str],
+                 direction: str = "outbound"):
+        self.context_id = uuid.uuid4().hex
+        self.customer_record = customer_record or dict(UNKNOWN_CUSTOMER)
+        self.service_type = service_type
+        self.direction = direction  # outbound, inbound
+        self.is_known_customer = customer_record is not None
+
+        self.request_uuid: Optional[str] = None  # Plivo API request id for originated calls
+        self.call_uuid: Optional[str] = None  # Plivo CallUUID, known once the call is answered
+        self.stream_id: Optional[str] = None  # Plivo audio stream id, known once the stream starts
+        self.retry_id: Optional[str] = None  # Retry queue entry this call was dialed from
+        self.attempts = 0  # Failed originations before this one
+        self.call_session: Optional[CallSession] = None
+        self.conversation_transcript: List[str] = []
+
+        self.created_at = datetime.utcnow()
+        self.answered = asyncio.Event()  # Media stream connected
+        self.finished = asyncio.Event()  # Media stream closed
+
+    @property
+    def customer_name(self) -> str:
+        return self.customer_record.get("name") or "Customer"
+
+    def mark_answered(self):
+        self.answered.set()
+
+    def mark_finished(self):
+        self.answered.set()
+        self.finished.set()
+
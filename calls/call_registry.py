@@ -0,0 +1,141 @@
+"""
+Registry of live call contexts, keyed by context id, Plivo CallUUID and stream id
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .call_context import CallContext
+
+logger = logging.getLogger(__name__)
+
+# Header used on the Plivo <Stream> element to carry the call key
+CALL_UUID_HEADER = "callUUID"
+
+
+def parse_extra_headers(extra_headers: Any) -> Dict[str, str]:
+    """Parse the Stream extraHeaders echoed back in the start event ("k=v,k=v" or JSON)"""
+    if not extra_headers:
+        return {}
+    if isinstance(extra_headers, dict):
+        return {str(key): str(value) for key, value in extra_headers.items()}
+
+    extra_headers = str(extra_headers).strip()
+    if extra_headers.startswith("{"):
+        try:
+            return {str(key): str(value) for key, value in json.loads(extra_headers).items()}
+        except (ValueError, AttributeError):
+            return {}
+
+    headers = {}
+    for pair in extra_headers.split(","):
+        key, _, value = pair.partition("=")
+        if key.strip():
+            headers[key.strip()] = value.strip()
+    return headers
+
+
+class CallRegistry:
+    """
+    Lookup of call contexts for every call that is ringing or live.
+
+    A context is registered under its own id when the call is originated (or the
+    inbound call arrives), bound to the Plivo CallUUID when the answer webhook
+    fires and to the stream id once /media-stream receives its start event, so
+    each stage finds its call in O(1) no matter how many calls overlap.
+    """
+
+    def __init__(self, unanswered_ttl: float = 600):
+        self.unanswered_ttl = unanswered_ttl
+        self._by_context_id: Dict[str, CallContext] = {}
+        self._by_call_uuid: Dict[str, CallContext] = {}
+        self._by_stream_id: Dict[str, CallContext] = {}
+        self._registered_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+
+    def register(self, context: CallContext) -> CallContext:
+        """Track a new call"""
+        with self._lock:
+            self._by_context_id[context.context_id] = context
+            self._registered_at[context.context_id] = time.monotonic()
+            if context.call_uuid:
+                self._by_call_uuid[context.call_uuid] = context
+        self._purge_unanswered()
+        return context
+
+    def bind_call_uuid(self, context: CallContext, call_uuid: Optional[str]):
+        """Key a context by the Plivo CallUUID"""
+        if not call_uuid:
+            return
+        with self._lock:
+            context.call_uuid = call_uuid
+            self._by_call_uuid[call_uuid] = context
+
+    def bind_stream(self, context: CallContext, stream_id: Optional[str]):
+        """Key a context by its Plivo audio stream id"""
+        if not stream_id:
+            return
+        with self._lock:
+            context.stream_id = stream_id
+            self._by_stream_id[stream_id] = context
+
+    def get(self, context_id: Optional[str]) -> Optional[CallContext]:
+        return self._by_context_id.get(context_id) if context_id else None
+
+    def get_by_call_uuid(self, call_uuid: Optional[str]) -> Optional[CallContext]:
+        return self._by_call_uuid.get(call_uuid) if call_uuid else None
+
+    def resolve_start_event(self, start_event: Dict[str, Any]) -> Optional[CallContext]:
+        """Find the context for a /media-stream start event and bind its stream id"""
+        start = start_event.get("start", {})
+        headers = parse_extra_headers(start_event.get("extra_headers") or start.get("extra_headers"))
+
+        context = (self.get_by_call_uuid(start.get("callId"))
+                   or self.get_by_call_uuid(headers.get(CALL_UUID_HEADER))
+                   or self.get(headers.get("call_context")))
+        if context:
+            self.bind_call_uuid(context, context.call_uuid or start.get("callId"))
+            self.bind_stream(context, start.get("streamId"))
+        return context
+
+    def remove(self, context: CallContext):
+        """Forget a finished call"""
+        with self._lock:
+            self._by_context_id.pop(context.context_id, None)
+            self._registered_at.pop(context.context_id, None)
+            if context.call_uuid and self._by_call_uuid.get(context.call_uuid) is context:
+                del self._by_call_uuid[context.call_uuid]
+            if context.stream_id and self._by_stream_id.get(context.stream_id) is context:
+                del self._by_stream_id[context.stream_id]
+
+    def _purge_unanswered(self):
+        """Drop calls whose media stream never connected (e.g. caller hung up in the IVR)"""
+        now = time.monotonic()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+
+        stale = [context for context_id, context in list(self._by_context_id.items())
+                 if not context.answered.is_set()
+                 and now - self._registered_at.get(context_id, now) > self.unanswered_ttl]
+        for context in stale:
+            self.remove(context)
+        if stale:
+            logger.info(f"🧹 Dropped {len(stale)} calls that never connected a media stream")
+
+    def __len__(self) -> int:
+        return len(self._by_context_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "registered_calls": len(self._by_context_id),
+            "answered_calls": len(self._by_call_uuid),
+            "streaming_calls": len(self._by_stream_id),
+        }
+
+
+# Global call registry instance
+call_registry = CallRegistry()
@@ -0,0 +1,398 @@
+"""
+Calling-window campaign scheduler driven by a hierarchical timer wheel
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from customers.due_index import DueDateIndex
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+CONTACT_LOOKUP_BATCH_SIZE = 2000  # Customer keys per find_contacted call
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel with one-tick resolution.
+
+    Level 0 has one slot per tick; each higher level has slots spanning a whole
+    revolution of the level below (seconds, minutes, hours, days with the default
+    layout).  When the clock reaches the start of a higher-level slot its timers are
+    cascaded down, so scheduling and expiry are O(1) per timer regardless of how
+    many releases a campaign has queued.  Deadlines beyond the top level wait in an
+    overflow list that is re-examined on every top-level cascade.
+    """
+
+    def __init__(self, start: float, tick: float = 1.0, slots_per_level: Tuple[int, ...] = (60, 60, 24, 32)):
+        self.tick = tick
+        self.slots_per_level = slots_per_level
+        self.spans = []  # Ticks covered by one slot of each level
+        span = 1
+        for slots in slots_per_level:
+            self.spans.append(span)
+            span *= slots
+        self.levels: List[List[List[Tuple[int, Any]]]] = [[[] for _ in range(slots)] for slots in slots_per_level]
+        self._overflow: List[Tuple[int, Any]] = []
+        self.current_tick = int(start // tick)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, deadline: float, item: Any) -> List[Any]:
+        """Add a timer; returns [item] straight away if the deadline has already passed"""
+        self._count += 1
+        expired: List[Any] = []
+        self._place((int(deadline // self.tick), item), expired)
+        return expired
+
+    def _place(self, entry: Tuple[int, Any], expired: List[Any]):
+        expire_tick = entry[0]
+        if expire_tick <= self.current_tick:
+            self._count -= 1
+            expired.append(entry[1])
+            return
+        for level, slots in enumerate(self.slots_per_level):
+            span = self.spans[level]
+            if expire_tick // span - self.current_tick // span < slots:
+                self.levels[level][(expire_tick // span) % slots].append(entry)
+                return
+        self._overflow.append(entry)
+
+    def advance(self, now: float) -> List[Any]:
+        """Move the clock to now and return every item whose deadline has passed"""
+        expired: List[Any] = []
+        target_tick = int(now // self.tick)
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            # Cascade higher levels whose slot starts at this tick, top level first
+            for level in range(len(self.slots_per_level) - 1, 0, -1):
+                span = self.spans[level]
+                if self.current_tick % span:
+                    continue
+                slot = self.levels[level][(self.current_tick // span) % self.slots_per_level[level]]
+                entries = slot[:]
+                slot.clear()
+                if level == len(self.slots_per_level) - 1 and self._overflow:
+                    entries.extend(self._overflow)
+                    self._overflow = []
+                for entry in entries:
+                    self._place(entry, expired)
+
+            slot = self.levels[0][self.current_tick % self.slots_per_level[0]]
+            for _, item in slot:
+                self._count -= 1
+                expired.append(item)
+            slot.clear()
+        return expired
+
+
+def parse_calling_windows(spec: str) -> List[Tuple[int, int]]:
+    """Parse "10:00-13:00,15:30-19:00" into sorted (start, end) seconds since local midnight"""
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start_text, end_text = part.split("-")
+            start = _seconds_since_midnight(start_text)
+            end = _seconds_since_midnight(end_text)
+        except ValueError:
+            raise ValueError(f"Invalid calling window '{part}', expected HH:MM-HH:MM")
+        if end <= start:
+            raise ValueError(f"Calling window '{part}' must end after it starts")
+        windows.append((start, end))
+    windows.sort()
+    for (_, previous_end), (start, _) in zip(windows, windows[1:]):
+        if start < previous_end:
+            raise ValueError(f"Calling windows overlap: {spec}")
+    return windows
+
+
+def _seconds_since_midnight(text: str) -> int:
+    hours, minutes = text.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 24 * 60:
+        raise ValueError(text)
+    return hours * 3600 + minutes * 60
+
+
+class CampaignScheduler:
+    """
+    Releases due customers into the dialer only inside the configured calling windows.
+
+    At every window opening the due customers are taken from the due-date index
+    (not by re-walking the records) and their releases are spread over the window
+    on a timer wheel, RELEASE_SPACING apart.  Customers are tracked by a key
+    (phone number, name and car model) rather than store row, so pending releases
+    survive a hot reload renumbering the rows.  Customers find_contacted reports
+    (persisted called/booked markers) are left out, so nobody is dialed again in a
+    later window or after a restart; it is asked in batches of
+    CONTACT_LOOKUP_BATCH_SIZE keys, in due order, only until the window or the
+    quota is full.  A daily quota caps releases and retries per
+    local day, and customers already released today are not released again in a
+    later window.  Releases still pending when a window closes are dropped; the
+    next window recomputes the due list from scratch.
+    """
+
+    def __init__(self, due_index: DueDateIndex, customer_keys: Callable[[], Sequence[str]],
+                 find_customer: Callable[[str], Optional[Dict[str, Any]]],
+                 submit: Callable[[Dict[str, Any], Optional[str]], Awaitable[Any]],
+                 windows: List[Tuple[int, int]], utc_offset_minutes: int, daily_quota: int,
+                 release_spacing: float,
+                 find_contacted: Optional[Callable[[List[str]], Awaitable[Set[str]]]] = None,
+                 tick: float = 1.0):
+        self.due_index = due_index
+        self.customer_keys = customer_keys  # Customer key by store row, for the due index's store
+        self.find_customer = find_customer  # Customer key -> due customer entry, or None
+        self.submit = submit
+        self.windows = windows
+        self.utc_offset = utc_offset_minutes * 60
+        self.daily_quota = daily_quota  # 0 for no quota
+        self.release_spacing = release_spacing
+        self.find_contacted = find_contacted
+        self.tick = tick
+
+        self.wheel: Optional[TimerWheel] = None
+        self._task: Optional[asyncio.Task] = None
+        self._window_end: Optional[float] = None
+        self._quota_day: Optional[int] = None
+        self._released_today: Set[str] = set()
+        self._retries_today = 0
+
+        # Counters
+        self.windows_opened = 0
+        self.released = 0
+        self.skipped_ineligible = 0
+        self.skipped_contacted = 0
+        self.dropped_at_window_close = 0
+        self.quota_rejections = 0
+        self.retries_released = 0
+        self.withdrawn = 0
+
+    def start(self) -> bool:
+        """Start the scheduler unless it is already running"""
+        if self._task is not None and not self._task.done():
+            return False
+        now = time.time()
+        self.wheel = TimerWheel(now, self.tick)
+        self._window_end = None
+        self._task = asyncio.create_task(self._run(now))
+        return True
+
+    async def stop(self):
+        """Stop releasing customers"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _local_day_start(self, now: float) -> float:
+        """Epoch time of the local midnight at or before now"""
+        return now - (now + self.utc_offset) % SECONDS_PER_DAY
+
+    def current_window_end(self, now: float) -> Optional[float]:
+        """End of the calling window now falls in, or None outside the windows"""
+        day_start = self._local_day_start(now)
+        for start, end in self.windows:
+            if day_start + start <= now < day_start + end:
+                return day_start + end
+        return None
+
+    def in_calling_window(self, now: float = None) -> bool:
+        """Whether customers may be called at this moment"""
+        return self.current_window_end(time.time() if now is None else now) is not None
+
+    def next_calling_time(self, now: float) -> Optional[float]:
+        """now if a call may be placed now, otherwise when the next window (with quota left) opens"""
+        self._reset_quota_day(now)
+        if self.current_window_end(now) is not None:
+            if self._quota_left() != 0:
+                return now
+            # Quota used up: wait for the first window of the next local day
+            return self._local_day_start(now) + SECONDS_PER_DAY + self.windows[0][0]
+        return self.next_window_start(now)
+
+    def next_window_start(self, now: float) -> Optional[float]:
+        """Start of the next calling window after now"""
+        if not self.windows:
+            return None
+        day_start = self._local_day_start(now)
+        for day in range(2):
+            for start, _ in self.windows:
+                boundary = day_start + day * SECONDS_PER_DAY + start
+                if boundary > now:
+                    return boundary
+        return None
+
+    async def _run(self, now: float):
+        if not self.windows:
+            logger.warning("⚠️ No calling windows configured, campaign scheduler is idle")
+            return
+
+        if self.current_window_end(now) is not None:
+            await self._fire(self.wheel.schedule(now, ("window_open", now)))
+        else:
+            self._schedule_next_window(now)
+
+        while True:
+            await asyncio.sleep(self.tick)
+            await self._fire(self.wheel.advance(time.time()))
+
+    def _schedule_next_window(self, now: float):
+        start = self.next_window_start(now)
+        if start is not None:
+            self.wheel.schedule(start, ("window_open", start))
+            logger.info(f"⏰ Next calling window opens at {self._local_time_text(start)}")
+
+    async def _fire(self, items: List[Tuple]):
+        items = list(items)
+        while items:
+            item = items.pop(0)
+            try:
+                # Boundaries carry their own time, timers may fire up to a tick early
+                if item[0] == "window_open":
+                    # Releases due straight away come back here rather than waiting a tick
+                    items.extend(await self._open_window(max(time.time(), item[1])))
+                elif item[0] == "window_close":
+                    self._close_window(max(time.time(), item[1]))
+                elif item[0] == "release":
+                    await self._release(item[1], item[2])
+            except Exception as e:
+                logger.error(f"❌ Campaign scheduler failed on {item[0]}: {e}")
+
+    def _reset_quota_day(self, now: float):
+        day = int((now + self.utc_offset) // SECONDS_PER_DAY)
+        if day != self._quota_day:
+            self._quota_day = day
+            self._released_today = set()
+            self._retries_today = 0
+
+    def _quota_left(self) -> Optional[int]:
+        if not self.daily_quota:
+            return None
+        return max(0, self.daily_quota - len(self._released_today) - self._retries_today)
+
+    async def _open_window(self, now: float) -> List[Tuple]:
+        window_end = self.current_window_end(now)
+        if window_end is None or window_end == self._window_end:
+            return []
+        self._window_end = window_end
+        self.windows_opened += 1
+        self._reset_quota_day(now)
+        self.wheel.schedule(window_end, ("window_close", window_end))
+
+        # Taken together, with no await in between, so rows and keys belong to one store
+        rows = self.due_index.eligible_rows()
+        row_keys = self.customer_keys()
+
+        capacity = math.ceil((window_end - now) / self.release_spacing) if self.release_spacing > 0 else len(rows)
+        quota_left = self._quota_left()
+        if quota_left is not None:
+            capacity = min(capacity, quota_left)
+
+        keys = []
+        seen = set(self._released_today)
+        for start in range(0, len(rows), CONTACT_LOOKUP_BATCH_SIZE):
+            if len(keys) >= capacity:
+                break
+            batch = []
+            for row in rows[start:start + CONTACT_LOOKUP_BATCH_SIZE]:
+                key = row_keys[row]
+                if key not in seen:  # Several rows of one customer get one call
+                    seen.add(key)
+                    batch.append(key)
+            if self.find_contacted and batch:
+                # If this raises the window stays open with nothing released, rather than redialing
+                contacted = await self.find_contacted(batch)
+                self.skipped_contacted += len(contacted)
+                batch = [key for key in batch if key not in contacted]
+            keys.extend(batch[:capacity - len(keys)])
+
+        # Spread the releases over the window; the ones that do not fit wait for the next window
+        expired = []
+        scheduled = 0
+        for position, key in enumerate(keys):
+            release_at = now + position * self.release_spacing
+            if release_at >= window_end:
+                break
+            expired.extend(self.wheel.schedule(release_at, ("release", key, window_end)))
+            scheduled += 1
+        logger.info(f"📋 Calling window open until {self._local_time_text(window_end)}: "
+                    f"releasing {scheduled} of {len(rows)} due customers")
+        return expired
+
+    def _close_window(self, now: float):
+        self._window_end = None
+        self._schedule_next_window(now)
+
+    async def _release(self, key: str, window_end: float):
+        now = time.time()
+        if now >= window_end or self._window_end != window_end:
+            self.dropped_at_window_close += 1
+            return
+        self._reset_quota_day(now)
+        if key in self._released_today:
+            return
+        if self._quota_left() == 0:
+            self.quota_rejections += 1
+            return
+        customer = self.find_customer(key)
+        if customer is None:
+            # Updated or removed by a hot reload since the window opened
+            self.skipped_ineligible += 1
+            return
+
+        self._released_today.add(key)
+        await self.submit(customer['record'], customer['service_type'])
+        self.released += 1
+
+    async def submit_retry(self, customer_record: Dict[str, Any], service_type: Optional[str], retry: Any) -> bool:
+        """Hand a due retry to the dialer if a window is open and the quota allows; False if not accepted"""
+        now = time.time()
+        self._reset_quota_day(now)
+        if self.current_window_end(now) is None:
+            return False
+        if self._quota_left() == 0:
+            self.quota_rejections += 1
+            return False
+        self._retries_today += 1
+        self.retries_released += 1
+        await self.submit(customer_record, service_type, retry=retry)
+        return True
+
+    def withdraw(self, key: str, retry: bool):
+        """Give back the quota of a released call that was not dialed before its window closed"""
+        self.withdrawn += 1
+        if retry:
+            self._retries_today = max(0, self._retries_today - 1)
+        else:
+            self._released_today.discard(key)
+
+    def _local_time_text(self, timestamp: float) -> str:
+        return (datetime.utcfromtimestamp(timestamp) + timedelta(seconds=self.utc_offset)).strftime("%Y-%m-%d %H:%M")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Campaign progress counters for monitoring"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "in_window": self._window_end is not None,
+            "pending_timers": len(self.wheel) if self.wheel else 0,
+            "windows_opened": self.windows_opened,
+            "released": self.released,
+            "released_today": len(self._released_today),
+            "retries_today": self._retries_today,
+            "daily_quota": self.daily_quota,
+            "retries_released": self.retries_released,
+            "withdrawn": self.withdrawn,
+            "skipped_ineligible": self.skipped_ineligible,
+            "skipped_contacted": self.skipped_contacted,
+            "dropped_at_window_close": self.dropped_at_window_close,
+            "quota_rejections": self.quota_rejections,
+        }
@@ -0,0 +1,115 @@
+"""
+Adaptive outbound call concurrency driven by realtime rate-limit telemetry
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from .rate_limiter import CallRateLimiter
+
+logger = logging.getLogger(__name__)
+
+DECREASE_COOLDOWN = 10  # Seconds between two backoffs, so one burst of events counts once
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD control of how many calls the dialer may have live at once.
+
+    Every rate_limits.updated event reports the remaining request and token
+    budget; when the smallest remaining fraction drops below headroom, or a
+    realtime connection fails or is rate limited, the limiter's concurrent-call
+    cap is multiplied by decrease_factor.  Each increase_interval without a
+    backoff, while calls are waiting for a slot, the cap grows by one, up to
+    max_limit.  Lowering the cap never ends live calls; new ones just wait.
+    Nothing is adjusted until start() has been called.
+    """
+
+    def __init__(self, rate_limiter: CallRateLimiter, min_limit: int, max_limit: int, headroom: float = 0.2,
+                 decrease_factor: float = 0.5, increase_interval: float = 30):
+        self.rate_limiter = rate_limiter
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.headroom = headroom
+        self.decrease_factor = decrease_factor
+        self.increase_interval = increase_interval
+
+        self.remaining_fraction: Optional[float] = None  # Latest reported budget left
+        self._last_decrease = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.increases = 0
+        self.decreases = 0
+        self.connection_errors = 0
+
+    @property
+    def limit(self) -> int:
+        return self.rate_limiter.max_concurrent_calls
+
+    async def start(self):
+        """Start probing for more concurrency"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def observe_event(self, event: Dict[str, Any]):
+        """Act on a rate_limits.updated or error event from a realtime session"""
+        if event.get("type") == "rate_limits.updated":
+            fractions = [max(0, limit.get("remaining", 0)) / limit["limit"]
+                         for limit in event.get("rate_limits", []) if limit.get("limit")]
+            if fractions:
+                self.remaining_fraction = min(fractions)
+                if self.remaining_fraction < self.headroom:
+                    self._decrease(f"only {self.remaining_fraction:.0%} of the rate limit left")
+        elif event.get("type") == "error":
+            error = event.get("error") or {}
+            if "rate_limit" in (error.get("code") or error.get("type") or ""):
+                self._decrease("realtime session was rate limited")
+
+    def observe_connection_error(self, error: Exception):
+        """A realtime session could not be opened"""
+        self.connection_errors += 1
+        self._decrease(f"realtime connection failed: {error!r}")
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if self._task is None or now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit < self.limit:
+            self.decreases += 1
+            logger.warning(f"📉 Lowering concurrent calls to {new_limit}: {reason}")
+            self.rate_limiter.lower_max_concurrent_calls(new_limit)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.increase_interval)
+            if time.monotonic() - self._last_decrease < self.increase_interval:
+                continue
+            if self.remaining_fraction is not None and self.remaining_fraction < self.headroom:
+                continue
+            limiter = self.rate_limiter
+            if self.limit < self.max_limit and (limiter.waiting or limiter.active_calls >= self.limit):
+                self.increases += 1
+                logger.info(f"📈 Raising concurrent calls to {self.limit + 1}")
+                await limiter.set_max_concurrent_calls(self.limit + 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current limit and adjustment counters"""
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "remaining_fraction": round(self.remaining_fraction, 3) if self.remaining_fraction is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "connection_errors": self.connection_errors,
+        }
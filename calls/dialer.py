@@ -0,0 +1,159 @@
+"""
+Concurrent outbound dialer - keeps several service calls in flight at once
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database.models import CallRetry
+from .call_context import CallContext
+from .call_registry import call_registry
+from .plivo_client import PlivoAPIError
+from .rate_limiter import CallRateLimiter
+from .retry_queue import CallRetryQueue
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundDialer:
+    """
+    Dials queued customers with up to max_concurrent_calls calls live at a time.
+
+    Each worker takes one customer from the queue, creates its CallContext,
+    originates the call and holds its slot until the media stream for that call
+    has closed (or the call was never answered).  The queue is bounded, so a feeder
+    awaiting submit() never materializes more than a few calls ahead of the workers.
+    Originations go through the rate limiter, and failed ones are handed to the
+    retry queue when one is configured.  A call not answered within answer_timeout
+    is handed to abandon(context) to be hung up, so a late answer never reaches a
+    call whose context is gone.  admit(context) is asked right before
+    each origination, so a call still queued when its calling window closes is
+    not dialed; admit is responsible for keeping it for later.
+    """
+
+    def __init__(self, originate: Callable[[CallContext], Awaitable[Any]], max_concurrent_calls: int,
+                 answer_timeout: float, max_call_duration: float, rate_limiter: CallRateLimiter,
+                 retry_queue: Optional[CallRetryQueue] = None,
+                 admit: Optional[Callable[[CallContext], Awaitable[bool]]] = None,
+                 abandon: Optional[Callable[[CallContext], Awaitable[Any]]] = None):
+        self.originate = originate
+        self.max_concurrent_calls = max_concurrent_calls
+        self.answer_timeout = answer_timeout
+        self.max_call_duration = max_call_duration
+        self.rate_limiter = rate_limiter
+        self.retry_queue = retry_queue
+        self.admit = admit
+        self.abandon = abandon
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent_calls * 2)
+        self._workers: List[asyncio.Task] = []
+
+        # Counters
+        self.in_flight = 0
+        self.originated_calls = 0
+        self.failed_calls = 0
+        self.carrier_rejections = 0  # Originations the carrier throttled (HTTP 429)
+        self.unanswered_calls = 0
+        self.completed_calls = 0
+        self.refused_calls = 0  # Queued calls admit() kept from being dialed
+
+    async def start(self):
+        """Start the dialer workers"""
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(worker_id))
+                         for worker_id in range(self.max_concurrent_calls)]
+        logger.info(f"📞 Outbound dialer started with {self.max_concurrent_calls} concurrent call slots")
+
+    async def stop(self):
+        """Cancel the dialer workers"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, customer_record: Dict[str, Any], service_type: Optional[str],
+                     retry: Optional[CallRetry] = None) -> CallContext:
+        """Queue a customer for calling, waiting while the queue is full"""
+        context = CallContext(customer_record, service_type)
+        if retry:
+            context.retry_id = retry.retry_id
+            context.attempts = retry.attempts
+        await self.queue.put(context)
+        return context
+
+    def free_slots(self) -> int:
+        """Customers that can be queued without waiting"""
+        return self.queue.maxsize - self.queue.qsize()
+
+    async def _worker(self, worker_id: int):
+        while True:
+            context = await self.queue.get()
+            try:
+                await self._run_call(context)
+            except Exception as e:
+                logger.error(f"❌ Dialer worker {worker_id} failed on {context.customer_name}: {e}")
+                if self.retry_queue:
+                    self.retry_queue.forget(context)
+            finally:
+                self.queue.task_done()
+
+    async def _run_call(self, context: CallContext):
+        # Refused calls take neither a call slot nor a rate-limit token
+        if self.admit and not await self.admit(context):
+            self.refused_calls += 1
+            return
+        await self.rate_limiter.acquire()
+        try:
+            self.in_flight += 1
+            call_registry.register(context)
+            try:
+                await self.originate(context)
+            except Exception as e:
+                self.failed_calls += 1
+                if isinstance(e, PlivoAPIError) and e.status == 429:
+                    self.carrier_rejections += 1
+                logger.error(f"❌ Failed to make call to {context.customer_name}: {e}")
+                if self.retry_queue:
+                    await self.retry_queue.schedule_failure(context, e)
+                return
+            self.originated_calls += 1
+            if self.retry_queue:
+                await self.retry_queue.mark_originated(context)
+
+            try:
+                await asyncio.wait_for(context.answered.wait(), self.answer_timeout)
+            except asyncio.TimeoutError:
+                self.unanswered_calls += 1
+                logger.info(f"📵 {context.customer_name} did not answer within {self.answer_timeout}s")
+                if self.abandon:
+                    try:
+                        await self.abandon(context)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Failed to hang up unanswered call to {context.customer_name}: {e}")
+                return
+
+            try:
+                await asyncio.wait_for(context.finished.wait(), self.max_call_duration)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Call with {context.customer_name} exceeded {self.max_call_duration}s, "
+                               f"releasing its dialer slot")
+            self.completed_calls += 1
+        finally:
+            self.in_flight -= 1
+            call_registry.remove(context)
+            await self.rate_limiter.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Dialer counters for monitoring"""
+        return {
+            "max_concurrent_calls": self.max_concurrent_calls,
+            "in_flight": self.in_flight,
+            "queued": self.queue.qsize(),
+            "originated_calls": self.originated_calls,
+            "failed_calls": self.failed_calls,
+            "carrier_rejections": self.carrier_rejections,
+            "unanswered_calls": self.unanswered_calls,
+            "completed_calls": self.completed_calls,
+            "refused_calls": self.refused_calls,
+        }
@@ -0,0 +1,126 @@
+"""
+Pre-rendered greeting audio, so answered calls hear their opening line straight away
+"""
+import asyncio
+import base64
+import json
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+SYNTHESIS_TIMEOUT = 30  # Seconds allowed for rendering one greeting
+
+
+def greeting_text(customer_name: str) -> str:
+    """Opening line of an outbound service call, as in the conversation flow"""
+    return (f"नमस्ते {customer_name} जी, मैं {settings.SERVICE_CENTER_NAME} से "
+            f"{settings.AI_VOICE_NAME} बोल रही हूँ। आप कैसे हैं?")
+
+
+async def render_speech(realtime_ai_ws, text: str) -> bytes:
+    """Have a configured realtime session speak text verbatim; returns g711 mu-law audio"""
+    await realtime_ai_ws.send(json.dumps({
+        "type": "response.create",
+        "response": {
+            "modalities": ["audio", "text"],
+            "instructions": f"Say exactly the following sentence, word for word, and nothing else: {text}",
+        }
+    }))
+
+    async def collect_audio() -> bytes:
+        audio = bytearray()
+        async for message in realtime_ai_ws:
+            event = json.loads(message)
+            if event.get('type') == 'response.audio.delta':
+                audio += base64.b64decode(event['delta'])
+            elif event.get('type') == 'response.done':
+                return bytes(audio)
+            elif event.get('type') == 'error':
+                raise RuntimeError(event.get('error', {}).get('message', 'realtime error'))
+        raise ConnectionError("Realtime session closed while rendering speech")
+
+    return await asyncio.wait_for(collect_audio(), SYNTHESIS_TIMEOUT)
+
+
+class GreetingAudioCache:
+    """
+    LRU cache of greeting audio keyed by greeting text.
+
+    prefetch() renders greetings in the background for customers about to be
+    dialed, at most `concurrency` at a time; get() only ever returns what is
+    already rendered, so the media stream never waits on synthesis.
+    """
+
+    def __init__(self, synthesize: Callable[[str], Awaitable[bytes]], max_entries: int = 500, concurrency: int = 2):
+        self.synthesize = synthesize
+        self.max_entries = max_entries
+        self._audio: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._synthesis_slots = asyncio.Semaphore(concurrency)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.evictions = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._audio)
+
+    def get(self, text: str) -> Optional[bytes]:
+        """Rendered audio for text, if it is cached"""
+        audio = self._audio.get(text)
+        if audio is None:
+            self.misses += 1
+            return None
+        self._audio.move_to_end(text)
+        self.hits += 1
+        return audio
+
+    def prefetch(self, text: str):
+        """Render text in the background unless it is cached or already being rendered"""
+        if text in self._audio:
+            self._audio.move_to_end(text)
+            return
+        if text not in self._pending:
+            self._pending[text] = asyncio.create_task(self._render(text))
+
+    async def _render(self, text: str):
+        try:
+            async with self._synthesis_slots:
+                audio = await self.synthesize(text)
+            if audio:
+                self._audio[text] = audio
+                self.rendered += 1
+                while len(self._audio) > self.max_entries:
+                    self._audio.popitem(last=False)
+                    self.evictions += 1
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ Failed to render greeting audio: {e}")
+        finally:
+            self._pending.pop(text, None)
+
+    async def close(self):
+        """Cancel greetings still being rendered"""
+        for task in list(self._pending.values()):
+            task.cancel()
+        await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        self._pending.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache counters for monitoring"""
+        return {
+            "entries": len(self._audio),
+            "rendering": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rendered": self.rendered,
+            "evictions": self.evictions,
+            "failures": self.failures,
+        }
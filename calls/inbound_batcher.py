@@ -0,0 +1,101 @@
+"""
+Inbound audio batching - coalesces Plivo media frames toward the realtime API
+"""
+import asyncio
+import base64
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from .media_frames import input_audio_append_event
+
+logger = logging.getLogger(__name__)
+
+
+class InboundAudioBatcher:
+    """
+    Concatenates one call's 20 ms Plivo frames into larger input_audio_buffer.append events.
+
+    A batch is sent as soon as it reaches max_bytes, or max_delay_ms after its first
+    frame arrived, whichever comes first, so batching never adds more than
+    max_delay_ms of latency.  flush() sends whatever is buffered straight away and is
+    used on stream start/stop.  With max_delay_ms of 0 every frame is sent on arrival.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_delay_ms: int = 80, max_bytes: int = 640):
+        self.send = send
+        self.max_delay = max_delay_ms / 1000
+        self.max_bytes = max_bytes
+
+        self._buffer = bytearray()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None  # Timer flush in progress
+        self._send_lock = asyncio.Lock()
+
+        # Counters
+        self.frames_received = 0
+        self.batches_sent = 0
+
+    async def add(self, payload: str):
+        """Buffer a base64 mu-law media payload"""
+        await self.add_audio(base64.b64decode(payload))
+
+    async def add_audio(self, audio: bytes):
+        """Buffer raw mu-law audio"""
+        self.frames_received += 1
+        if not audio:
+            return
+        self._buffer += audio
+
+        if self.max_delay <= 0 or len(self._buffer) >= self.max_bytes:
+            await self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush_on_timer)
+
+    def _flush_on_timer(self):
+        self._flush_timer = None
+        self._flush_task = asyncio.create_task(self._flush_quietly())
+
+    async def _flush_quietly(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to send batched inbound audio: {e}")
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    async def flush(self):
+        """Send everything buffered as one append event"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+
+        audio = bytes(self._buffer)
+        self._buffer.clear()
+        async with self._send_lock:
+            await self.send(input_audio_append_event(base64.b64encode(audio).decode("ascii")))
+        self.batches_sent += 1
+
+    def discard(self):
+        """Drop buffered audio, e.g. once the realtime connection is gone"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        self._buffer.clear()
+
+    async def stop(self):
+        """Drop buffered audio and cancel a timer flush that is still sending"""
+        self.discard()
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Per-call batching counters"""
+        return {
+            "frames_received": self.frames_received,
+            "batches_sent": self.batches_sent,
+        }
@@ -0,0 +1,30 @@
+"""
+Pre-built media frames for forwarding audio between Plivo and the realtime API
+"""
+import json
+
+# Both sides carry base64 g711 mu-law at 8 kHz, so payloads are spliced in untouched
+_PLAY_AUDIO_PREFIX = '{"event": "playAudio", "media": {"contentType": "audio/x-mulaw", "sampleRate": 8000, "payload": "'
+_PLAY_AUDIO_SUFFIX = '"}}'
+_INPUT_AUDIO_APPEND_PREFIX = '{"type": "input_audio_buffer.append", "audio": "'
+_INPUT_AUDIO_APPEND_SUFFIX = '"}'
+
+
+def _needs_escaping(payload: str) -> bool:
+    # Base64 never contains these; anything else goes through json.dumps
+    return '"' in payload or '\\' in payload or '\n' in payload
+
+
+def play_audio_frame(payload: str) -> str:
+    """Plivo playAudio frame for a base64 mu-law payload, without decoding it"""
+    if _needs_escaping(payload):
+        return json.dumps({"event": "playAudio",
+                           "media": {"contentType": "audio/x-mulaw", "sampleRate": 8000, "payload": payload}})
+    return _PLAY_AUDIO_PREFIX + payload + _PLAY_AUDIO_SUFFIX
+
+
+def input_audio_append_event(payload: str) -> str:
+    """Realtime API input_audio_buffer.append event for a base64 mu-law payload"""
+    if _needs_escaping(payload):
+        return json.dumps({"type": "input_audio_buffer.append", "audio": payload})
+    return _INPUT_AUDIO_APPEND_PREFIX + payload + _INPUT_AUDIO_APPEND_SUFFIX
@@ -0,0 +1,122 @@
+"""
+Async Plivo REST client for call origination over a pool of keep-alive connections
+"""
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PLIVO_API_BASE_URL = "https://api.plivo.com/v1/Account/{auth_id}/"
+USER_AGENT = "automotive-service-dialer"
+
+
+class PlivoAPIError(Exception):
+    """Plivo rejected a REST request"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Plivo API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class AsyncPlivoClient:
+    """
+    Originates Plivo calls without blocking the event loop.
+
+    One aiohttp session is shared by every request, so campaign dials reuse the
+    pooled TLS connections instead of paying a handshake per call.
+    """
+
+    def __init__(self, auth_id: str, auth_token: str, pool_size: int = 10, timeout: float = 15):
+        self.auth_id = auth_id
+        self.auth_token = auth_token
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.base_url = PLIVO_API_BASE_URL.format(auth_id=auth_id)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Counters
+        self.requests_sent = 0
+        self.request_errors = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                auth=aiohttp.BasicAuth(self.auth_id, self.auth_token),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests_sent += 1
+        try:
+            async with self._get_session().post(self.base_url + path, json=payload) as response:
+                if response.status >= 400:
+                    raise PlivoAPIError(response.status, await self._error_message(response))
+                return await response.json(content_type=None) or {}
+        except Exception:
+            self.request_errors += 1
+            raise
+
+    async def _delete(self, path: str):
+        self.requests_sent += 1
+        try:
+            async with self._get_session().delete(self.base_url + path) as response:
+                if response.status >= 400:
+                    raise PlivoAPIError(response.status, await self._error_message(response))
+        except Exception:
+            self.request_errors += 1
+            raise
+
+    @staticmethod
+    async def _error_message(response: aiohttp.ClientResponse) -> str:
+        """Error text of a failed request; the body may be JSON, HTML or empty"""
+        text = (await response.text(errors="replace")).strip()
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = None
+        if isinstance(body, dict) and body.get("error"):
+            return str(body["error"])
+        return text[:200] or response.reason or "no response body"
+
+    async def create_call(self, from_: str, to_: str, answer_url: str, answer_method: str = "GET",
+                          ring_timeout: Optional[int] = None) -> Dict[str, Any]:
+        """Originate a call, same parameters as plivo.RestClient().calls.create"""
+        payload = {
+            "from": from_,
+            "to": to_,
+            "answer_url": answer_url,
+            "answer_method": answer_method,
+        }
+        if ring_timeout:
+            payload["ring_timeout"] = ring_timeout
+        return await self._post("Call/", payload)
+
+    async def hangup_request(self, request_uuid: str):
+        """Cancel a call that is still queued or ringing"""
+        await self._delete(f"Request/{request_uuid}/")
+
+    async def hangup_call(self, call_uuid: str):
+        """Hang up a call that has been answered"""
+        await self._delete(f"Call/{call_uuid}/")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Request counters for monitoring"""
+        return {
+            "pool_size": self.pool_size,
+            "requests_sent": self.requests_sent,
+            "request_errors": self.request_errors,
+        }
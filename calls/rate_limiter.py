@@ -0,0 +1,111 @@
+"""
+Token-bucket limiter for outbound call originations
+"""
+import asyncio
+import logging
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available"""
+        self._refill()
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class CallRateLimiter:
+    """
+    Gates call originations on a calls-per-second bucket and a concurrent-call cap.
+
+    acquire() waits for a free call slot and then for a token; every successful
+    acquire() must be paired with release() once the call has ended.
+    """
+
+    def __init__(self, calls_per_second: float, burst: int, max_concurrent_calls: int):
+        self.bucket = TokenBucket(calls_per_second, burst)
+        self.max_concurrent_calls = max_concurrent_calls
+        self.active_calls = 0
+        self._slot_available = asyncio.Condition()
+
+        # Counters
+        self.waiting = 0
+        self.granted = 0
+        self.throttled = 0  # Acquires delayed by the calls-per-second limit
+        self.concurrency_rejections = 0  # Acquires delayed by the concurrent-call cap
+
+    async def acquire(self):
+        """Wait for a call slot and a token"""
+        self.waiting += 1
+        try:
+            async with self._slot_available:
+                if self.active_calls >= self.max_concurrent_calls:
+                    self.concurrency_rejections += 1
+                    await self._slot_available.wait_for(
+                        lambda: self.active_calls < self.max_concurrent_calls)
+                self.active_calls += 1
+
+            try:
+                if not self.bucket.try_acquire():
+                    self.throttled += 1
+                    while not self.bucket.try_acquire():
+                        await asyncio.sleep(self.bucket.wait_time())
+            except BaseException:
+                await self.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.granted += 1
+
+    async def release(self):
+        """Free the call slot taken by acquire()"""
+        async with self._slot_available:
+            self.active_calls = max(0, self.active_calls - 1)
+            self._slot_available.notify()
+
+    def lower_max_concurrent_calls(self, limit: int):
+        """Shrink the concurrent-call cap at once; waiters need no wake-up when the cap only drops"""
+        self.max_concurrent_calls = max(1, min(limit, self.max_concurrent_calls))
+
+    async def set_max_concurrent_calls(self, limit: int):
+        """Change the concurrent-call cap; calls already live are not affected"""
+        async with self._slot_available:
+            self.max_concurrent_calls = max(1, limit)
+            self._slot_available.notify_all()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Limiter depth and rejection counters for monitoring"""
+        return {
+            "calls_per_second": self.bucket.rate,
+            "max_concurrent_calls": self.max_concurrent_calls,
+            "active_calls": self.active_calls,
+            "waiting": self.waiting,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "concurrency_rejections": self.concurrency_rejections,
+        }
@@ -0,0 +1,201 @@
+"""
+Load balancing and failover across realtime AI deployments
+"""
+import asyncio
+import logging
+import math
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SMOOTHING = 0.3  # Weight of the newest connect latency in the moving average
+ERROR_HALF_LIFE = 60  # Seconds for an endpoint's error score to halve
+FAILURE_COOLDOWN = 30  # Seconds an endpoint is avoided after a failed connection
+TELEMETRY_EVENT_TYPES = ('rate_limits.updated', 'error')
+
+
+class NoRealtimeEndpointError(ConnectionError):
+    """Every realtime endpoint is at its session cap"""
+
+
+class RealtimeEndpoint:
+    """One realtime deployment with its session cap and health telemetry"""
+
+    def __init__(self, url: str, api_key: str, max_sessions: int = 20):
+        self.url = url
+        self.api_key = api_key
+        self.max_sessions = max(1, max_sessions)
+
+        parsed = urlparse(url)
+        deployment = parse_qs(parsed.query).get("deployment", [""])[0]
+        self.name = f"{parsed.netloc}/{deployment}" if deployment else parsed.netloc
+
+        self._sessions: "weakref.WeakSet" = weakref.WeakSet()
+        self.connect_latency: Optional[float] = None  # Moving average, seconds
+        self._error_score = 0.0
+        self._error_scored_at = time.monotonic()
+        self.rate_limit_pressure = 0.0  # 0 with the whole budget left, 1 when exhausted
+        self.cooldown_until = 0.0
+
+        # Counters
+        self.connects = 0
+        self.connect_failures = 0
+        self.error_events = 0
+
+    @property
+    def active_sessions(self) -> int:
+        return sum(1 for session in list(self._sessions) if getattr(session, "open", True))
+
+    def track(self, session):
+        """Count session against this endpoint until it is closed"""
+        self._sessions.add(session)
+
+    def has_capacity(self) -> bool:
+        return self.active_sessions < self.max_sessions
+
+    def error_score(self, now: float) -> float:
+        """Recent errors, each one decaying with ERROR_HALF_LIFE"""
+        return self._error_score * math.pow(0.5, (now - self._error_scored_at) / ERROR_HALF_LIFE)
+
+    def add_error(self, now: float, weight: float = 1.0):
+        self._error_score = self.error_score(now) + weight
+        self._error_scored_at = now
+
+    def score(self, now: float) -> float:
+        """Lower is better: session load plus penalties for latency, errors, rate limits and cooldown"""
+        score = self.active_sessions / self.max_sessions
+        score += self.connect_latency or 0.0
+        score += 0.5 * self.error_score(now)
+        score += self.rate_limit_pressure
+        if now < self.cooldown_until:
+            score += 100
+        return score
+
+    def get_stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "active_sessions": self.active_sessions,
+            "max_sessions": self.max_sessions,
+            "connect_latency_ms": round(self.connect_latency * 1000) if self.connect_latency is not None else None,
+            "error_score": round(self.error_score(now), 2),
+            "rate_limit_pressure": round(self.rate_limit_pressure, 2),
+            "cooling_down": now < self.cooldown_until,
+            "score": round(self.score(now), 2),
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "error_events": self.error_events,
+        }
+
+
+def parse_realtime_endpoints(spec: str, default_max_sessions: int = 20) -> List[RealtimeEndpoint]:
+    """Parse "url|api-key|max_sessions;url|api-key" into endpoints; the cap is optional"""
+    endpoints = []
+    for part in spec.split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        fields = [field.strip() for field in part.split("|")]
+        if len(fields) not in (2, 3) or not fields[0] or not fields[1]:
+            raise ValueError(f"Invalid realtime endpoint {part.split('|')[0]!r}, expected url|api-key|max_sessions")
+        max_sessions = int(fields[2]) if len(fields) == 3 and fields[2] else default_max_sessions
+        endpoints.append(RealtimeEndpoint(fields[0], fields[1], max_sessions))
+    return endpoints
+
+
+class RealtimeEndpointBalancer:
+    """
+    Opens realtime sessions on the least loaded healthy deployment.
+
+    Endpoints are tried in score order (session load, connect latency, decaying
+    error count, rate-limit pressure reported by rate_limits.updated); a failed or
+    slow connection puts the endpoint in a short cooldown and the next one is
+    tried.  Endpoints at their session cap are skipped.  connect(endpoint) must
+    return a connected websocket.
+    """
+
+    def __init__(self, endpoints: List[RealtimeEndpoint], connect: Callable[[RealtimeEndpoint], Awaitable[Any]],
+                 connect_timeout: float = 10):
+        if not endpoints:
+            raise ValueError("At least one realtime endpoint is required")
+        self.endpoints = endpoints
+        self.connect = connect
+        self.connect_timeout = connect_timeout
+        self._session_endpoints: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+        # Counters
+        self.failovers = 0
+        self.capacity_rejections = 0
+
+    async def open_session(self):
+        """Connect to the best endpoint, failing over to the others"""
+        now = time.monotonic()
+        candidates = sorted((endpoint for endpoint in self.endpoints if endpoint.has_capacity()),
+                            key=lambda endpoint: endpoint.score(now))
+        if not candidates:
+            self.capacity_rejections += 1
+            raise NoRealtimeEndpointError("All realtime endpoints are at their session cap")
+
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(candidates):
+            if attempt:
+                self.failovers += 1
+            started = time.monotonic()
+            try:
+                session = await asyncio.wait_for(self.connect(endpoint), self.connect_timeout)
+            except Exception as e:
+                last_error = e
+                now = time.monotonic()
+                endpoint.connect_failures += 1
+                endpoint.add_error(now)
+                endpoint.cooldown_until = now + FAILURE_COOLDOWN
+                logger.warning(f"⚠️ Realtime endpoint {endpoint.name} failed to connect: {e!r}")
+                continue
+
+            latency = time.monotonic() - started
+            endpoint.connect_latency = latency if endpoint.connect_latency is None else \
+                LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * endpoint.connect_latency
+            endpoint.connects += 1
+            endpoint.track(session)
+            self._session_endpoints[session] = endpoint
+            return session
+
+        raise last_error
+
+    def record_event(self, session, event: Dict[str, Any]):
+        """Feed a rate_limits.updated or error event from a session into its endpoint's score"""
+        endpoint = self._session_endpoints.get(session)
+        if endpoint is None:
+            return
+        now = time.monotonic()
+
+        if event.get("type") == "rate_limits.updated":
+            pressure = 0.0
+            for limit in event.get("rate_limits", []):
+                if not limit.get("limit"):
+                    continue
+                remaining = max(0, limit.get("remaining", 0))
+                pressure = max(pressure, 1 - remaining / limit["limit"])
+                if remaining == 0:
+                    endpoint.cooldown_until = max(endpoint.cooldown_until, now + limit.get("reset_seconds", 0))
+            endpoint.rate_limit_pressure = pressure
+
+        elif event.get("type") == "error":
+            endpoint.error_events += 1
+            error = event.get("error") or {}
+            if "rate_limit" in (error.get("code") or error.get("type") or ""):
+                endpoint.add_error(now, 2.0)
+                endpoint.cooldown_until = max(endpoint.cooldown_until, now + FAILURE_COOLDOWN)
+            else:
+                endpoint.add_error(now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-endpoint health and balancer counters"""
+        now = time.monotonic()
+        return {
+            "endpoints": [endpoint.get_stats(now) for endpoint in self.endpoints],
+            "failovers": self.failovers,
+            "capacity_rejections": self.capacity_rejections,
+        }
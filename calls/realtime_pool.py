@@ -0,0 +1,212 @@
+"""
+Pool of pre-connected, pre-configured realtime AI sessions
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Reservation:
+    """A session being warmed for one specific call"""
+
+    def __init__(self):
+        self.session: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.claimed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class RealtimeSessionPool:
+    """
+    Keeps realtime websocket sessions open and configured ahead of the calls that need them.
+
+    reserve(key) starts connecting a session for one call as soon as the dialer
+    originates it; acquire(key) hands that session to the media stream when the
+    callee answers.  A reservation nobody claims within reservation_timeout is
+    closed.  Calls without a reservation (inbound calls) take one of idle_size
+    warm sessions, and only fall back to connecting on the spot when none is left.
+    open_session() must return a connected websocket; configure_session() sends
+    the call-independent session.update, so at answer time only the
+    customer-specific instructions remain to be sent.
+    """
+
+    def __init__(self, open_session: Callable[[], Awaitable[Any]], configure_session: Callable[[Any], Awaitable[None]],
+                 idle_size: int = 2, max_idle_age: float = 300, reservation_timeout: float = 120,
+                 maintenance_interval: float = 30):
+        self.open_session = open_session
+        self.configure_session = configure_session
+        self.idle_size = idle_size
+        self.max_idle_age = max_idle_age
+        self.reservation_timeout = reservation_timeout
+        self.maintenance_interval = maintenance_interval
+
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (session, opened_at)
+        self._opening_idle = 0
+        self._opening_tasks: Set[asyncio.Task] = set()  # Idle sessions being opened
+        self._reservations: Dict[str, _Reservation] = {}
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.reserved_hits = 0
+        self.idle_hits = 0
+        self.cold_opens = 0
+        self.expired_reservations = 0
+        self.open_failures = 0
+
+    async def start(self):
+        """Fill the idle pool and keep it fresh"""
+        if self._maintenance_task is None:
+            self._replenish()
+            self._maintenance_task = asyncio.create_task(self._maintain())
+
+    async def close(self):
+        """Close every pooled session"""
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            await asyncio.gather(self._maintenance_task, return_exceptions=True)
+            self._maintenance_task = None
+        for task in list(self._opening_tasks):
+            task.cancel()
+        await asyncio.gather(*self._opening_tasks, return_exceptions=True)
+        for key in list(self._reservations):
+            await self.cancel(key)
+        while self._idle:
+            session, _ = self._idle.popleft()
+            await self._close_quietly(session)
+
+    async def _open(self):
+        session = await self.open_session()
+        try:
+            await self.configure_session(session)
+        except Exception:
+            await self._close_quietly(session)
+            raise
+        return session
+
+    @staticmethod
+    async def _close_quietly(session):
+        try:
+            await session.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_open(session) -> bool:
+        return getattr(session, "open", True)
+
+    # Reservations for originated calls
+    def reserve(self, key: str):
+        """Start warming a session for the call identified by key"""
+        if key in self._reservations:
+            return
+        reservation = _Reservation()
+        reservation.task = asyncio.create_task(self._warm_reservation(key, reservation))
+        self._reservations[key] = reservation
+
+    async def _warm_reservation(self, key: str, reservation: _Reservation):
+        try:
+            session = await self._open()
+        except Exception as e:
+            self.open_failures += 1
+            logger.warning(f"⚠️ Failed to pre-warm realtime session: {e}")
+            reservation.session.set_exception(e)
+            if self._reservations.get(key) is reservation and not reservation.claimed.is_set():
+                del self._reservations[key]
+                reservation.session.exception()  # Nobody will await it now
+            return
+        reservation.session.set_result(session)
+
+        try:
+            await asyncio.wait_for(reservation.claimed.wait(), self.reservation_timeout)
+        except asyncio.TimeoutError:
+            if self._reservations.get(key) is reservation:
+                del self._reservations[key]
+            self.expired_reservations += 1
+            await self._close_quietly(session)
+
+    async def cancel(self, key: str):
+        """Give up a reservation, e.g. when the origination failed"""
+        reservation = self._reservations.pop(key, None)
+        if reservation is None:
+            return
+        reservation.claimed.set()
+        if reservation.session.done():
+            if not reservation.session.cancelled() and reservation.session.exception() is None:
+                await self._close_quietly(reservation.session.result())
+        else:
+            reservation.task.cancel()
+
+    # Handing out sessions
+    async def acquire(self, key: Optional[str] = None):
+        """Session for a call: its reservation, else a warm idle one, else a new connection"""
+        reservation = self._reservations.pop(key, None) if key else None
+        if reservation:
+            reservation.claimed.set()
+            try:
+                session = await reservation.session
+                if self._is_open(session):
+                    self.reserved_hits += 1
+                    return session
+            except Exception as e:
+                logger.warning(f"⚠️ Reserved realtime session unavailable: {e}")
+
+        now = time.monotonic()
+        while self._idle:
+            session, opened_at = self._idle.popleft()
+            if self._is_open(session) and now - opened_at < self.max_idle_age:
+                self.idle_hits += 1
+                self._replenish()
+                return session
+            await self._close_quietly(session)
+
+        self._replenish()
+        self.cold_opens += 1
+        return await self._open()
+
+    # Idle pool upkeep
+    def _replenish(self):
+        missing = self.idle_size - len(self._idle) - self._opening_idle
+        for _ in range(max(0, missing)):
+            self._opening_idle += 1
+            task = asyncio.create_task(self._open_idle())
+            self._opening_tasks.add(task)
+            task.add_done_callback(self._opening_tasks.discard)
+
+    async def _open_idle(self):
+        try:
+            session = await self._open()
+            self._idle.append((session, time.monotonic()))
+        except Exception as e:
+            self.open_failures += 1
+            logger.warning(f"⚠️ Failed to open idle realtime session: {e}")
+        finally:
+            self._opening_idle -= 1
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            now = time.monotonic()
+            fresh = deque()
+            while self._idle:
+                session, opened_at = self._idle.popleft()
+                if self._is_open(session) and now - opened_at < self.max_idle_age:
+                    fresh.append((session, opened_at))
+                else:
+                    await self._close_quietly(session)
+            self._idle.extend(fresh)
+            self._replenish()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Pool counters for monitoring"""
+        return {
+            "idle_sessions": len(self._idle),
+            "reservations": len(self._reservations),
+            "reserved_hits": self.reserved_hits,
+            "idle_hits": self.idle_hits,
+            "cold_opens": self.cold_opens,
+            "expired_reservations": self.expired_reservations,
+            "open_failures": self.open_failures,
+        }
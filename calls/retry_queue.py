@@ -0,0 +1,196 @@
+"""
+Mongo-backed retry queue for outbound calls that failed to originate
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from database.db_service import db_service
+from database.models import CallRetry
+from .call_context import CallContext
+from .plivo_client import PlivoAPIError
+
+logger = logging.getLogger(__name__)
+
+RETRY_LEASE_SECONDS = 300  # A claimed retry becomes due again if its lease is not renewed in time
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Network errors, throttling and carrier-side failures are worth another attempt"""
+    if isinstance(error, PlivoAPIError):
+        return error.status == 429 or error.status >= 500
+    return True
+
+
+class CallRetryQueue:
+    """
+    Schedules failed originations again with exponential backoff and jitter.
+
+    Retries live in the call_retries collection, so they survive restarts. A poll
+    task claims due retries and resubmits them to the dialer; the retry document is
+    deleted once the call is originated or its attempts are used up.  Only as many
+    retries are claimed as the dialer has free queue slots, and the lease of every
+    retry still waiting in the dialer is renewed on each poll, so a retry is never
+    claimed twice while it is queued.  Outside the
+    calling windows nothing is claimed, and a retry that cannot be dialed yet is
+    deferred to the next calling time without using up an attempt.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, poll_interval: float = 15):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._submit: Optional[Callable[..., Awaitable[Any]]] = None
+        self._next_calling_time: Optional[Callable[[float], Optional[float]]] = None
+        self._free_slots: Optional[Callable[[], int]] = None
+        self._leased: Set[str] = set()  # Retries handed to the dialer and not yet resolved
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.depth = 0
+        self.scheduled = 0
+        self.resubmitted = 0
+        self.abandoned = 0
+        self.deferred = 0
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Exponential backoff with equal jitter for the given number of failed attempts"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(attempts - 1, 0)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def start(self, submit: Callable[..., Awaitable[Any]],
+                    next_calling_time: Optional[Callable[[float], Optional[float]]] = None,
+                    free_slots: Optional[Callable[[], int]] = None):
+        """
+        Start resubmitting due retries through submit(customer_record, service_type, retry=...).
+
+        submit may return False to refuse a retry, which is then deferred.
+        next_calling_time(now) returns now when calls may be placed, otherwise when
+        they may next be placed (None for not at all).  free_slots() caps how many
+        retries one poll claims.
+        """
+        self._submit = submit
+        self._next_calling_time = next_calling_time
+        self._free_slots = free_slots
+        if self._task is None:
+            self.depth = await db_service.count_call_retries()
+            self._task = asyncio.create_task(self._poll_loop())
+            logger.info(f"🔁 Call retry queue started with {self.depth} pending retries")
+
+    async def stop(self):
+        """Stop the poll task"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def schedule_failure(self, context: CallContext, error: Exception):
+        """Queue another attempt for a call whose origination failed"""
+        attempts = context.attempts + 1
+        retry_id = context.retry_id
+        self.forget(context)
+        if attempts >= self.max_attempts or not is_retryable_error(error):
+            self.abandoned += 1
+            logger.warning(f"⚠️ Giving up on {context.customer_name} after {attempts} attempt(s): {error}")
+            if retry_id and await db_service.delete_call_retry(retry_id):
+                self.depth = max(0, self.depth - 1)
+            return
+
+        retry = CallRetry(
+            customer_record=context.customer_record,
+            service_type=context.service_type,
+            attempts=attempts,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=self.backoff_delay(attempts)),
+            last_error=str(error)[:500],
+        )
+        if retry_id:
+            retry.retry_id = retry_id
+        if await db_service.save_call_retry(retry):
+            self.scheduled += 1
+            if not retry_id:
+                self.depth += 1
+            logger.info(f"🔁 Retry {attempts} for {context.customer_name} at {retry.next_attempt_at:%H:%M:%S}")
+
+    def _resume_at(self, now: float) -> Optional[datetime]:
+        """When a deferred retry should become due again"""
+        resume_at = self._next_calling_time(now) if self._next_calling_time else now
+        if resume_at is None or resume_at <= now:
+            resume_at = now + self.poll_interval
+        return datetime.utcfromtimestamp(resume_at)
+
+    async def defer(self, context: CallContext):
+        """Keep a call that could not be dialed yet for the next calling time, without using an attempt"""
+        retry = CallRetry(
+            customer_record=context.customer_record,
+            service_type=context.service_type,
+            attempts=context.attempts,
+            next_attempt_at=self._resume_at(time.time()),
+        )
+        if context.retry_id:
+            retry.retry_id = context.retry_id
+        self.forget(context)
+        if await db_service.save_call_retry(retry):
+            self.deferred += 1
+            if not context.retry_id:
+                self.depth += 1
+            logger.info(f"⏰ Deferred call to {context.customer_name} until {retry.next_attempt_at:%Y-%m-%d %H:%M} UTC")
+
+    def forget(self, context: CallContext):
+        """Stop renewing the lease of a call's retry; if nothing else resolves it, it becomes due again"""
+        if context.retry_id:
+            self._leased.discard(context.retry_id)
+
+    async def mark_originated(self, context: CallContext):
+        """Drop the retry document of a call that has now been placed"""
+        self.forget(context)
+        if context.retry_id and await db_service.delete_call_retry(context.retry_id):
+            self.depth = max(0, self.depth - 1)
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                if self._leased:
+                    lease_until = datetime.utcnow() + timedelta(seconds=RETRY_LEASE_SECONDS)
+                    await db_service.renew_call_retry_leases(list(self._leased), lease_until)
+                await self._resubmit_due()
+            except Exception as e:
+                logger.error(f"❌ Call retry poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _resubmit_due(self):
+        if self._next_calling_time:
+            now = time.time()
+            resume_at = self._next_calling_time(now)
+            if resume_at is None or resume_at > now:
+                return  # Outside the calling windows; due retries wait in Mongo
+
+        limit = self._free_slots() if self._free_slots else 50
+        if limit <= 0:
+            return  # Dialer queue is full; claiming now would only age the leases
+
+        lease_until = datetime.utcnow() + timedelta(seconds=RETRY_LEASE_SECONDS)
+        for retry in await db_service.claim_due_call_retries(lease_until, limit, exclude=self._leased):
+            self._leased.add(retry.retry_id)
+            if await self._submit(retry.customer_record, retry.service_type, retry=retry) is False:
+                # The window closed or the quota ran out since the check above
+                self._leased.discard(retry.retry_id)
+                retry.next_attempt_at = self._resume_at(time.time())
+                if await db_service.save_call_retry(retry):
+                    self.deferred += 1
+                continue
+            self.resubmitted += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Queue depth and counters for monitoring"""
+        return {
+            "depth": self.depth,
+            "in_dialer": len(self._leased),
+            "scheduled": self.scheduled,
+            "resubmitted": self.resubmitted,
+            "abandoned": self.abandoned,
+            "deferred": self.deferred,
+        }
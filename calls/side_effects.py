@@ -0,0 +1,134 @@
+"""
+Side-effect pipeline - runs transcript saves, broadcasts and bookings off the audio loop
+"""
+import asyncio
+import logging
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class SideEffectPipeline:
+    """
+    Bounded queues drained by worker tasks, shared by every call in the process.
+
+    The media stream only calls submit() and submit_required(), which never wait.
+    submit() is for transcripts and telemetry: when the target queue is full the
+    job is dropped and counted.  submit_required() is for work that must not be
+    lost (bookings, call sessions): it is queued even past the bound, and stop()
+    waits for it.  Jobs with the same key always go to the same worker, so one
+    call's transcripts are saved and broadcast in order, and jobs for a shared
+    resource (the appointments workbook) never run at once.
+    """
+
+    def __init__(self, workers: int = 4, max_queue_size: int = 1000, drain_timeout: float = 5):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, max_queue_size // self.workers)
+        self.drain_timeout = drain_timeout
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._required_pending = 0  # submit_required() jobs not finished yet
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    async def start(self):
+        """Start the worker tasks"""
+        if self._tasks:
+            return
+        # Unbounded: submit() enforces queue_size itself so required jobs are never refused
+        self._queues = [asyncio.Queue() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+        logger.info(f"⚙️ Side-effect pipeline started with {self.workers} workers")
+
+    async def stop(self):
+        """Give queued jobs a moment to finish, wait for required ones, then cancel the workers"""
+        if not self._tasks:
+            return
+        drained = asyncio.gather(*(queue.join() for queue in self._queues))
+        try:
+            await asyncio.wait_for(asyncio.shield(drained), self.drain_timeout)
+        except asyncio.TimeoutError:
+            if self._required_pending:
+                logger.warning(f"⚠️ Waiting for {self._required_pending} required side-effects to finish")
+                await drained
+            else:
+                drained.cancel()
+                logger.warning(f"⚠️ Side-effect pipeline stopped with {self.depth} jobs still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, key: str, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> bool:
+        """Queue job(*args, **kwargs) without waiting; False if it was dropped"""
+        if not self._tasks:
+            self.dropped += 1
+            logger.warning(f"⚠️ Side-effect pipeline not running, dropped {getattr(job, '__name__', job)}")
+            return False
+
+        queue = self._queue_for(key)
+        if queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            if self.dropped % 100 == 1:  # Don't flood the log while overloaded
+                logger.warning(f"⚠️ Side-effect queue full, dropped {getattr(job, '__name__', job)} for {key} "
+                               f"({self.dropped} dropped so far)")
+            return False
+
+        self._enqueue(queue, job, args, kwargs, required=False)
+        return True
+
+    def submit_required(self, key: str, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> bool:
+        """Queue job(*args, **kwargs) without waiting, even if the queue is full; False only if not running"""
+        if not self._tasks:
+            logger.error(f"❌ Side-effect pipeline not running, cannot queue {getattr(job, '__name__', job)}")
+            return False
+
+        self._required_pending += 1
+        self._enqueue(self._queue_for(key), job, args, kwargs, required=True)
+        return True
+
+    def _queue_for(self, key: str) -> asyncio.Queue:
+        return self._queues[zlib.crc32(key.encode()) % self.workers]
+
+    def _enqueue(self, queue: asyncio.Queue, job, args, kwargs, required: bool):
+        queue.put_nowait((job, args, kwargs, required))
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            job, args, kwargs, required = await queue.get()
+            try:
+                await job(*args, **kwargs)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Side-effect {getattr(job, '__name__', job)} failed: {e}")
+            finally:
+                if required:
+                    self._required_pending -= 1
+                queue.task_done()
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Queue depth and drop counters for monitoring"""
+        return {
+            "workers": self.workers,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "capacity": self.queue_size * self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "required_pending": self._required_pending,
+        }
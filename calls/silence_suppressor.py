@@ -0,0 +1,90 @@
+"""
+Local silence suppression for inbound mu-law call audio
+"""
+from collections import deque
+from typing import Deque, Dict
+
+import numpy as np
+
+MULAW_BYTES_PER_MS = 8  # 8 kHz, one byte per sample
+FULL_SCALE = 32768.0
+
+
+def _mulaw_decode_table() -> np.ndarray:
+    """G.711 mu-law code -> 16-bit linear sample"""
+    codes = ~np.arange(256, dtype=np.uint8)
+    exponent = (codes >> 4) & 0x07
+    mantissa = (codes & 0x0F).astype(np.int32)
+    magnitude = ((mantissa << 3) + 0x84) << exponent.astype(np.int32)
+    magnitude -= 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_TO_LINEAR = _mulaw_decode_table().astype(np.float32)
+
+
+def frame_energy(audio: bytes) -> float:
+    """Mean square amplitude of a mu-law frame"""
+    if not audio:
+        return 0.0
+    samples = MULAW_TO_LINEAR[np.frombuffer(audio, dtype=np.uint8)]
+    return float(np.dot(samples, samples)) / len(samples)
+
+
+class SilenceSuppressor:
+    """
+    Drops long silent stretches of one call's inbound audio.
+
+    Frames whose energy is above threshold_dbfs count as speech and are forwarded,
+    followed by hangover_ms of whatever comes next so server VAD still sees the
+    trailing silence that ends a turn.  Beyond that, silent frames are held back;
+    only the last padding_ms of them are kept and sent just ahead of the next
+    speech frame, giving server VAD its prefix padding.
+    """
+
+    def __init__(self, threshold_dbfs: float = -45, hangover_ms: int = 800, padding_ms: int = 300):
+        self.threshold_energy = (FULL_SCALE * 10 ** (threshold_dbfs / 20)) ** 2
+        self.hangover_bytes = hangover_ms * MULAW_BYTES_PER_MS
+        self.padding_bytes = padding_ms * MULAW_BYTES_PER_MS
+
+        self._hangover_left = 0
+        self._padding: Deque[bytes] = deque()
+        self._padding_size = 0
+
+        # Counters
+        self.bytes_received = 0
+        self.bytes_forwarded = 0
+
+    def process(self, audio: bytes) -> bytes:
+        """Audio to forward for this frame, possibly empty or prefixed with held-back padding"""
+        self.bytes_received += len(audio)
+
+        if frame_energy(audio) >= self.threshold_energy:
+            self._hangover_left = self.hangover_bytes
+            if self._padding:
+                audio = b"".join(self._padding) + audio
+                self._padding.clear()
+                self._padding_size = 0
+        elif self._hangover_left > 0:
+            self._hangover_left -= len(audio)
+        else:
+            self._padding.append(audio)
+            self._padding_size += len(audio)
+            while self._padding and self._padding_size - len(self._padding[0]) >= self.padding_bytes:
+                self._padding_size -= len(self._padding.popleft())
+            return b""
+
+        self.bytes_forwarded += len(audio)
+        return audio
+
+    @property
+    def bytes_suppressed(self) -> int:
+        return self.bytes_received - self.bytes_forwarded
+
+    def get_stats(self) -> Dict[str, int]:
+        """Per-call suppression counters"""
+        return {
+            "bytes_received": self.bytes_received,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_suppressed": self.bytes_suppressed,
+        }
@@ -0,0 +1,114 @@
+"""
+Due-date priority index over the customer record store
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .eligibility import due_ordinal, regular_service_gap_days
+from .record_store import CustomerRecordStore, MISSING_DATE
+
+
+def service_type_for_row(store: CustomerRecordStore, row: int) -> str:
+    """Service type a due customer is called for"""
+    return "first_service" if store.last_service_ordinals[row] == MISSING_DATE else "second_service"
+
+
+class DueDateIndex:
+    """
+    Customers ordered by the day they become due for first or regular service.
+
+    Rows that are not yet due wait in a min-heap keyed by their due ordinal.  When
+    the day rolls over only the rows whose due date has arrived are popped from the
+    heap and inserted into the sorted eligible list, so lookups never rescan the
+    whole store.  The eligible list keeps sheet order.
+    """
+
+    def __init__(self):
+        self.store: Optional[CustomerRecordStore] = None
+        self._pending: List[Tuple[int, int]] = []  # (due_ordinal, row) min-heap
+        self._eligible: List[int] = []  # Rows due as of _today_ordinal, sorted
+        self._today_ordinal: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def build(self, store: CustomerRecordStore, today_ordinal: int = None):
+        """Index every row of the store"""
+        if today_ordinal is None:
+            today_ordinal = datetime.now().date().toordinal()
+
+        regular_gap = regular_service_gap_days()
+        pending = []
+        eligible = []
+        for row in range(len(store)):
+            due = due_ordinal(store, row, regular_gap)
+            if due is None:
+                continue
+            if due <= today_ordinal:
+                eligible.append(row)
+            else:
+                pending.append((due, row))
+        heapq.heapify(pending)
+
+        with self._lock:
+            self.store = store
+            self._pending = pending
+            self._eligible = eligible
+            self._today_ordinal = today_ordinal
+
+    def adopt(self, other: "DueDateIndex"):
+        """Take over the contents of an index built elsewhere (e.g. in a worker thread)"""
+        with other._lock:
+            state = other.store, other._pending, other._eligible, other._today_ordinal
+        with self._lock:
+            self.store, self._pending, self._eligible, self._today_ordinal = state
+
+    def refresh(self, today_ordinal: int = None):
+        """Move rows that became due since the last refresh into the eligible list"""
+        if today_ordinal is None:
+            today_ordinal = datetime.now().date().toordinal()
+
+        with self._lock:
+            if self.store is None or today_ordinal == self._today_ordinal:
+                return
+            if today_ordinal < self._today_ordinal:
+                # Clock moved backwards - eligibility is no longer monotonic, start over
+                self.build(self.store, today_ordinal)
+                return
+
+            while self._pending and self._pending[0][0] <= today_ordinal:
+                _, row = heapq.heappop(self._pending)
+                insort(self._eligible, row)
+            self._today_ordinal = today_ordinal
+
+    def discard(self, rows: List[int]):
+        """Stop treating rows as due, e.g. once the customer has booked; a rebuild restores them"""
+        removed = set(rows)
+        with self._lock:
+            self._eligible = [row for row in self._eligible if row not in removed]
+            pending = [entry for entry in self._pending if entry[1] not in removed]
+            if len(pending) != len(self._pending):
+                heapq.heapify(pending)
+                self._pending = pending
+
+    def due_date_ordinal(self, row: int) -> Optional[int]:
+        """Ordinal of the day a row became (or becomes) due, or None if never"""
+        return due_ordinal(self.store, row, regular_service_gap_days())
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._eligible)
+
+    def eligible_rows(self) -> List[int]:
+        """Snapshot of all currently eligible rows in sheet order"""
+        self.refresh()
+        with self._lock:
+            return list(self._eligible)
+
+    def is_eligible(self, row: int) -> bool:
+        """Whether a row is currently due for service"""
+        self.refresh()
+        with self._lock:
+            position = bisect_left(self._eligible, row)
+            return position < len(self._eligible) and self._eligible[position] == row
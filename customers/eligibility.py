@@ -0,0 +1,111 @@
+"""
+Service eligibility rules, and the vectorized engine for bulk campaign planning
+
+classify_service_types() and due_ordinal() (which drives the due-date index the
+dialer uses) are the two forms of the same rules: change them together.  Both
+take their gaps from SERVICE_REMINDER_DAYS and regular_service_gap_days().
+"""
+import math
+from datetime import date, datetime
+from typing import List, Optional
+
+import numpy as np
+
+from settings import settings
+from .record_store import CustomerRecordStore, INVALID_DATE, MISSING_DATE
+
+DAYS_PER_MONTH = 30.44  # Average days per month, same as the original eligibility check
+
+# Service type codes returned by classify_service_types
+NO_SERVICE = 0
+FIRST_SERVICE = 1
+SECOND_SERVICE = 2
+SERVICE_TYPE_NAMES = (None, "first_service", "second_service")
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def regular_service_gap_days() -> int:
+    """Smallest number of days since last service that satisfies REGULAR_SERVICE_MONTHS"""
+    months = settings.REGULAR_SERVICE_MONTHS
+    gap = math.ceil(months * DAYS_PER_MONTH)
+    # Walk the float boundary so the gap agrees exactly with days / DAYS_PER_MONTH >= months
+    while gap > 0 and (gap - 1) / DAYS_PER_MONTH >= months:
+        gap -= 1
+    while gap / DAYS_PER_MONTH < months:
+        gap += 1
+    return gap
+
+
+def due_ordinal(store: CustomerRecordStore, row: int, regular_gap: int) -> Optional[int]:
+    """Ordinal of the first day the customer becomes eligible, or None if never"""
+    delivery = store.delivery_ordinals[row]
+    if delivery <= MISSING_DATE:
+        return None
+
+    last_service = store.last_service_ordinals[row]
+    if last_service == MISSING_DATE:
+        return delivery + settings.SERVICE_REMINDER_DAYS
+    if last_service == INVALID_DATE:
+        return None
+    return last_service + regular_gap
+
+
+def _ordinals_to_datetime64(ordinals) -> np.ndarray:
+    """Convert a store ordinal column to datetime64[D], with NaT for missing/invalid dates"""
+    values = np.frombuffer(ordinals, dtype=np.int32).astype(np.int64)
+    dates = (values - UNIX_EPOCH_ORDINAL).astype("datetime64[D]")
+    dates[values <= MISSING_DATE] = np.datetime64("NaT")
+    return dates
+
+
+def service_date_arrays(store: CustomerRecordStore):
+    """Delivery and last service dates of every customer as datetime64[D] arrays"""
+    if not len(store):
+        empty = np.array([], dtype="datetime64[D]")
+        return empty, empty
+    return (_ordinals_to_datetime64(store.delivery_ordinals),
+            _ordinals_to_datetime64(store.last_service_ordinals))
+
+
+def classify_service_types(store: CustomerRecordStore, today: date = None) -> np.ndarray:
+    """
+    Classify every customer in one pass.
+
+    Returns a uint8 array with NO_SERVICE, FIRST_SERVICE or SECOND_SERVICE per row,
+    using the first/regular service rules against today's date.
+    """
+    if today is None:
+        today = datetime.now().date()
+
+    delivery_dates, last_service_dates = service_date_arrays(store)
+    codes = np.zeros(len(delivery_dates), dtype=np.uint8)
+    if not len(codes):
+        return codes
+
+    last_service_ordinals = np.frombuffer(store.last_service_ordinals, dtype=np.int32)
+    today64 = np.datetime64(today, "D")
+
+    delivery_valid = ~np.isnat(delivery_dates)
+    never_serviced = last_service_ordinals == MISSING_DATE
+    serviced = ~np.isnat(last_service_dates)
+
+    days_since_delivery = (today64 - delivery_dates).astype(np.int64)
+    days_since_service = (today64 - last_service_dates).astype(np.int64)
+
+    first_service = delivery_valid & never_serviced & (days_since_delivery >= settings.SERVICE_REMINDER_DAYS)
+    second_service = delivery_valid & serviced & (days_since_service >= regular_service_gap_days())
+
+    codes[first_service] = FIRST_SERVICE
+    codes[second_service] = SECOND_SERVICE
+    return codes
+
+
+def eligible_rows(codes: np.ndarray) -> List[int]:
+    """Rows that need a service call, in sheet order"""
+    return np.flatnonzero(codes).tolist()
+
+
+def service_type_name(code: int) -> Optional[str]:
+    """Map a service type code back to the name used everywhere else"""
+    return SERVICE_TYPE_NAMES[code]
@@ -0,0 +1,84 @@
+"""
+Normalized phone number index for caller lookup
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from .record_store import CustomerRecordStore
+
+COUNTRY_CODE = "91"
+NATIONAL_NUMBER_LENGTH = 10
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone_number(phone_number: Any) -> str:
+    """
+    Reduce a phone number to its national digits.
+
+    "+91 90498 65451", "919049865451" (as Plivo sends it) and "09049865451" all
+    normalize to "9049865451".
+    """
+    if phone_number is None:
+        return ""
+    if isinstance(phone_number, float) and phone_number.is_integer():
+        phone_number = int(phone_number)  # Numeric Excel cells
+
+    digits = _NON_DIGITS.sub("", str(phone_number)).lstrip("0")
+    if len(digits) == len(COUNTRY_CODE) + NATIONAL_NUMBER_LENGTH and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits.lstrip("0")
+
+
+def customer_key(phone_number: Any, name: Optional[str], car_model: Optional[str]) -> str:
+    """Key a customer is tracked by across reloads and restarts: phone number, name and car model"""
+    return "|".join((normalize_phone_number(phone_number), name or "", car_model or ""))
+
+
+class PhoneIndex:
+    """
+    Normalized phone number -> store rows (several customers may share a number).
+
+    The customer key of every row is computed while building, so callers that
+    need keys for many rows (campaign windows) only do list lookups.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, List[int]] = {}
+        self._keys: List[str] = []  # Customer key by store row
+        self._lock = threading.Lock()
+
+    def build(self, store: CustomerRecordStore):
+        """Index every row of the store"""
+        rows: Dict[str, List[int]] = {}
+        keys: List[str] = []
+        for row in range(len(store)):
+            phone_number = normalize_phone_number(store.phone_numbers[row])
+            if phone_number:
+                rows.setdefault(phone_number, []).append(row)
+            keys.append("|".join((phone_number, store.names[row] or "",
+                                  store.car_models[store.car_model_codes[row]] or "")))
+        with self._lock:
+            self._rows = rows
+            self._keys = keys
+
+    def adopt(self, other: "PhoneIndex"):
+        """Take over the contents of an index built elsewhere (e.g. in a worker thread)"""
+        with self._lock:
+            self._rows = other._rows
+            self._keys = other._keys
+
+    def customer_key(self, row: int) -> str:
+        """Customer key of a store row"""
+        return self._keys[row]
+
+    def customer_keys(self) -> List[str]:
+        """Customer key of every store row, indexed by row; the list is never modified"""
+        return self._keys
+
+    def lookup(self, phone_number: Any) -> List[int]:
+        """All rows registered under a phone number"""
+        return list(self._rows.get(normalize_phone_number(phone_number), ()))
+
+    def __len__(self) -> int:
+        return len(self._rows)
@@ -0,0 +1,181 @@
+"""
+On-disk cache of parsed customer records, keyed by the workbook fingerprint
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from datetime import time, timedelta
+from typing import Any, Dict, List, Optional
+
+from .record_store import CustomerRecordStore, StringColumn
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAGIC = b"PTCRCACH"
+CACHE_VERSION = 2
+SECTION_ALIGNMENT = 8
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Store column name -> (attribute path, typecode or None for raw bytes)
+CACHE_SECTIONS = {
+    "names_data": ("names", "data", None),
+    "names_offsets": ("names", "offsets", "I"),
+    "phone_numbers_data": ("phone_numbers", "data", None),
+    "phone_numbers_offsets": ("phone_numbers", "offsets", "I"),
+    "addresses_data": ("addresses", "data", None),
+    "addresses_offsets": ("addresses", "offsets", "I"),
+    "car_model_codes": ("car_model_codes", None, "I"),
+    "delivery_ordinals": ("delivery_ordinals", None, "i"),
+    "last_service_ordinals": ("last_service_ordinals", None, "i"),
+}
+
+
+def workbook_fingerprint(filename: str) -> Dict[str, Any]:
+    """Size, modification time and SHA-256 of the workbook"""
+    stat = os.stat(filename)
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def _tag_cell(value: Any) -> List[Any]:
+    """[type tag, JSON value] for a raw cell, so cached invalid dates keep their type"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return ["json", value]
+    if isinstance(value, time):
+        return ["time", value.isoformat()]
+    if isinstance(value, timedelta):
+        return ["timedelta", value.total_seconds()]
+    raise TypeError(f"cannot cache {type(value).__name__} cell {value!r}")
+
+
+def _untag_cell(tagged: List[Any]) -> Any:
+    tag, value = tagged
+    if tag == "time":
+        return time.fromisoformat(value)
+    if tag == "timedelta":
+        return timedelta(seconds=value)
+    return value
+
+
+def _section_buffer(store: CustomerRecordStore, section: str):
+    attribute, column, _ = CACHE_SECTIONS[section]
+    value = getattr(store, attribute)
+    return getattr(value, column) if column else value
+
+
+def write_record_cache(store: CustomerRecordStore, fingerprint: Dict[str, Any], cache_file: str) -> bool:
+    """Serialize the store next to its workbook fingerprint (best effort)"""
+    try:
+        sections = {}
+        offset = 0
+        for name in CACHE_SECTIONS:
+            length = memoryview(_section_buffer(store, name)).nbytes
+            sections[name] = [offset, length]
+            offset += length + (-length % SECTION_ALIGNMENT)
+
+        header = json.dumps({
+            "version": CACHE_VERSION,
+            "byteorder": sys.byteorder,
+            "itemsizes": {"I": store.car_model_codes.itemsize, "i": store.delivery_ordinals.itemsize},
+            "fingerprint": fingerprint,
+            "rows": len(store),
+            "car_models": store.car_models,
+            "invalid_dates": [[row, field, _tag_cell(raw)] for (row, field), raw in store.invalid_dates.items()],
+            "sections": sections,
+        }).encode("utf-8")
+
+        prefix = CACHE_MAGIC + struct.pack("<I", len(header)) + header
+        prefix += b"\0" * (-len(prefix) % SECTION_ALIGNMENT)
+
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(prefix)
+            for name in CACHE_SECTIONS:
+                data = memoryview(_section_buffer(store, name)).cast("B")
+                f.write(data)
+                f.write(b"\0" * (-len(data) % SECTION_ALIGNMENT))
+        os.replace(temp_file, cache_file)
+
+        logger.info(f"💾 Cached {len(store)} customer records to {cache_file}")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to write customer record cache {cache_file}: {e}")
+        return False
+
+
+def read_record_cache(fingerprint: Dict[str, Any], cache_file: str) -> Optional[CustomerRecordStore]:
+    """
+    Memory-map a cached store if it was written for the same workbook fingerprint.
+
+    Returns None when there is no cache, it is unreadable or the workbook changed.
+    """
+    if not cache_file or not os.path.exists(cache_file):
+        return None
+
+    mapped = None
+    views = []  # Exports of the mapping, released before it is closed
+    try:
+        with open(cache_file, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mapped[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            return None
+        header_start = len(CACHE_MAGIC) + 4
+        (header_length,) = struct.unpack("<I", mapped[len(CACHE_MAGIC):header_start])
+        header = json.loads(mapped[header_start:header_start + header_length].decode("utf-8"))
+
+        store = CustomerRecordStore()
+        if (header.get("version") != CACHE_VERSION
+                or header.get("byteorder") != sys.byteorder
+                or header.get("itemsizes") != {"I": store.car_model_codes.itemsize,
+                                               "i": store.delivery_ordinals.itemsize}
+                or header.get("fingerprint") != fingerprint):
+            return None
+
+        data_start = header_start + header_length
+        data_start += -data_start % SECTION_ALIGNMENT
+        view = memoryview(mapped)
+        views.append(view)
+
+        columns = {}
+        for name, (offset, length) in header["sections"].items():
+            _, _, typecode = CACHE_SECTIONS[name]
+            section = view[data_start + offset:data_start + offset + length]
+            views.append(section)
+            columns[name] = section.cast(typecode) if typecode else section
+            views.append(columns[name])
+
+        store.names = StringColumn(columns["names_data"], columns["names_offsets"])
+        store.phone_numbers = StringColumn(columns["phone_numbers_data"], columns["phone_numbers_offsets"])
+        store.addresses = StringColumn(columns["addresses_data"], columns["addresses_offsets"])
+        store.car_model_codes = columns["car_model_codes"]
+        store.delivery_ordinals = columns["delivery_ordinals"]
+        store.last_service_ordinals = columns["last_service_ordinals"]
+        store.car_models = header["car_models"]
+        store._car_model_codes = {model: code for code, model in enumerate(store.car_models) if model is not None}
+        store.invalid_dates = {(row, field): _untag_cell(raw) for row, field, raw in header["invalid_dates"]}
+
+        if len(store) != header["rows"]:
+            return None
+        store.mapped_file = mapped  # Keep the mapping alive as long as the store
+        mapped = None
+        return store
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable customer record cache {cache_file}: {e}")
+        return None
+    finally:
+        if mapped is not None:
+            for view in reversed(views):
+                view.release()
+            mapped.close()
@@ -0,0 +1,185 @@
+"""
+Compact columnar store for customer records read from Customer_Records.xlsx
+"""
+import logging
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import openpyxl
+
+logger = logging.getLogger(__name__)
+
+# Sentinel ordinals used in the date columns (real ordinals are always >= 1)
+MISSING_DATE = 0  # Cell left empty in the sheet
+INVALID_DATE = -1  # Cell present but not a valid "%Y-%m-%d" date
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# Number of columns read from the customer sheet
+CUSTOMER_COLUMNS = 6
+
+
+class StringColumn:
+    """Append-only UTF-8 string column stored as a single byte buffer plus offsets"""
+
+    def __init__(self, data=None, offsets=None):
+        self.data = data if data is not None else bytearray()
+        self.offsets = offsets if offsets is not None else array("I", [0])
+
+    def append(self, value: Any):
+        """Append a cell value; None and empty strings are stored as empty"""
+        if value is not None:
+            self.data += str(value).encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if start == end:
+            return None
+        return bytes(self.data[start:end]).decode("utf-8")
+
+
+class CustomerRecordStore:
+    """
+    Customer records kept column by column instead of one dict per row.
+
+    Text fields live in StringColumn buffers, car models are interned into a small
+    lookup table and both service dates are pre-parsed to date ordinals, so the
+    eligibility checks never have to call strptime again.  Indexing the store still
+    returns the same record dict the rest of the application has always used.
+
+    A store is not modified once loaded; a hot reload swaps in a whole new store.
+    """
+
+    def __init__(self):
+        self.names = StringColumn()
+        self.phone_numbers = StringColumn()
+        self.addresses = StringColumn()
+
+        # Interned car models: code 0 is reserved for "no model"
+        self.car_models: List[Optional[str]] = [None]
+        self._car_model_codes: Dict[str, int] = {}
+        self.car_model_codes = array("I")
+
+        self.delivery_ordinals = array("i")
+        self.last_service_ordinals = array("i")
+
+        # Raw text of unparseable dates, keyed by (row, field name)
+        self.invalid_dates: Dict[Tuple[int, str], Any] = {}
+
+        self._date_cache: Dict[str, int] = {}
+
+        # Set when the columns are views over a memory-mapped cache file
+        self.mapped_file = None
+
+    def __len__(self) -> int:
+        return len(self.delivery_ordinals)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self.get_record(row)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("customer record index out of range")
+        return self.get_record(row)
+
+    def _intern_car_model(self, car_model: Any) -> int:
+        if car_model is None or car_model == "":
+            return 0
+        car_model = str(car_model)
+        code = self._car_model_codes.get(car_model)
+        if code is None:
+            code = len(self.car_models)
+            self.car_models.append(car_model)
+            self._car_model_codes[car_model] = code
+        return code
+
+    def _to_ordinal(self, value: Any) -> int:
+        """Convert a sheet cell to a date ordinal, caching parsed strings"""
+        if isinstance(value, datetime):
+            return value.date().toordinal()
+        if isinstance(value, date):
+            return value.toordinal()
+        if isinstance(value, str):
+            ordinal = self._date_cache.get(value)
+            if ordinal is None:
+                try:
+                    ordinal = datetime.strptime(value, DATE_FORMAT).date().toordinal()
+                except ValueError:
+                    ordinal = INVALID_DATE
+                self._date_cache[value] = ordinal
+            return ordinal
+        return INVALID_DATE
+
+    def append_row(self, row: Tuple[Any, ...]):
+        """Append one worksheet row (name, phone, address, car model, delivery, last service)"""
+        if len(row) < CUSTOMER_COLUMNS:
+            row = tuple(row) + (None,) * (CUSTOMER_COLUMNS - len(row))
+
+        index = len(self)
+        self.names.append(row[0])
+        self.phone_numbers.append(row[1])
+        self.addresses.append(row[2])
+        self.car_model_codes.append(self._intern_car_model(row[3]))
+
+        delivery = self._to_ordinal(row[4])
+        if delivery == INVALID_DATE:
+            self.invalid_dates[(index, "car_delivery_date")] = row[4]
+        self.delivery_ordinals.append(delivery)
+
+        last_service = self._to_ordinal(row[5]) if row[5] else MISSING_DATE
+        if last_service == INVALID_DATE:
+            self.invalid_dates[(index, "last_servicing_date")] = row[5]
+        self.last_service_ordinals.append(last_service)
+
+    def _date_value(self, row: int, field: str, ordinal: int):
+        if ordinal == MISSING_DATE:
+            return None
+        if ordinal == INVALID_DATE:
+            return self.invalid_dates.get((row, field))
+        return date.fromordinal(ordinal).strftime(DATE_FORMAT)
+
+    def get_record(self, row: int) -> Dict[str, Any]:
+        """Materialize a single row as the classic customer record dict"""
+        return {
+            "name": self.names[row],
+            "phone_number": self.phone_numbers[row],
+            "address": self.addresses[row],
+            "car_model": self.car_models[self.car_model_codes[row]],
+            "car_delivery_date": self._date_value(row, "car_delivery_date", self.delivery_ordinals[row]),
+            "last_servicing_date": self._date_value(row, "last_servicing_date", self.last_service_ordinals[row]),
+        }
+
+
+def load_customer_records(filename: str) -> CustomerRecordStore:
+    """
+    Stream Customer_Records.xlsx into a CustomerRecordStore.
+
+    The workbook is opened in read-only mode so rows are parsed lazily from the
+    sheet XML instead of building the full cell tree in memory.
+    """
+    store = CustomerRecordStore()
+
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        # Some exporters write a wrong <dimension>; ignore it and read until the last row
+        ws.reset_dimensions()
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            if not row or row[0] is None:  # Skip empty rows
+                continue
+            store.append_row(row)
+    finally:
+        wb.close()
+
+    if store.invalid_dates:
+        logger.warning(f"⚠️ {len(store.invalid_dates)} invalid service dates found in {filename}")
+
+    return store
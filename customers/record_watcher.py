@@ -0,0 +1,95 @@
+"""
+Background hot reload of Customer_Records.xlsx
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Optional
+
+from .record_cache import workbook_fingerprint, write_record_cache
+from .record_store import CustomerRecordStore, load_customer_records
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerRecordWatcher:
+    """
+    Polls the customer workbook and reloads it off the event loop when it changes.
+
+    A change is only picked up once the file size and mtime have been stable for a
+    full poll interval, so a workbook that is still being saved is not read half
+    written.  Parsing and build_indexes (the lookup structures for the new store)
+    run in the default executor; on_reload then only swaps references on the
+    event loop thread.
+    """
+
+    def __init__(self, filename: str, build_indexes: Callable[[CustomerRecordStore], Any],
+                 on_reload: Callable[[CustomerRecordStore, Any], None],
+                 interval: float, cache_file: str = None):
+        self.filename = filename
+        self.build_indexes = build_indexes
+        self.on_reload = on_reload
+        self.interval = interval
+        self.cache_file = cache_file
+        self._task: Optional[asyncio.Task] = None
+        self._loaded_stat = None
+        self._pending_stat = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    async def start(self):
+        """Start watching the workbook"""
+        if self._task is None:
+            self._loaded_stat = self._stat()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"👀 Watching {self.filename} for changes every {self.interval}s")
+
+    async def stop(self):
+        """Stop watching the workbook"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            stat = self._stat()
+            if stat is None or stat == self._loaded_stat:
+                self._pending_stat = None
+                continue
+            if stat != self._pending_stat:
+                # Changed since the last poll - wait until the save has settled
+                self._pending_stat = stat
+                continue
+
+            try:
+                await self.reload()
+                self._loaded_stat = stat
+            except Exception as e:
+                logger.error(f"❌ Failed to reload {self.filename}: {e}")
+            self._pending_stat = None
+
+    def _load(self):
+        fingerprint = workbook_fingerprint(self.filename)
+        new_store = load_customer_records(self.filename)
+        indexes = self.build_indexes(new_store)
+        if self.cache_file:
+            write_record_cache(new_store, fingerprint, self.cache_file)
+        return new_store, indexes
+
+    async def reload(self) -> CustomerRecordStore:
+        """Re-read the workbook and build its indexes in a worker thread, then swap them in"""
+        loop = asyncio.get_running_loop()
+        new_store, indexes = await loop.run_in_executor(None, self._load)
+        self.on_reload(new_store, indexes)
+        logger.info(f"🔄 Reloaded {self.filename}: {len(new_store)} customer records")
+        return new_store
@@ -0,0 +1,128 @@
+"""
+Appointment exports - CSV and xlsx generated from the appointments collection as they are downloaded
+"""
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+from typing import AsyncIterator, List
+
+from openpyxl import Workbook
+
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADERS = [
+    "Call ID",
+    "Customer Name",
+    "Phone Number",
+    "Car Model",
+    "Service Type",
+    "Appointment Date",
+    "Appointment Time",
+    "Time Slot",
+    "Address",
+    "Booked At",
+]
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+CSV_ROWS_PER_CHUNK = 200
+XLSX_CHUNK_SIZE = 64 * 1024
+
+
+def export_row(appointment: Appointment) -> List[str]:
+    """Cell values in EXPORT_HEADERS order"""
+    return [
+        appointment.call_id,
+        appointment.customer_name,
+        appointment.customer_phone,
+        appointment.car_model or "",
+        appointment.service_type or "",
+        appointment.appointment_date or "Date to be confirmed",
+        appointment.appointment_time or "Time to be confirmed",
+        appointment.time_slot or "",
+        appointment.address or "",
+        appointment.booked_at.strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+
+
+async def stream_csv(appointments: AsyncIterator[Appointment]) -> AsyncIterator[bytes]:
+    """
+    CSV export, sent every CSV_ROWS_PER_CHUNK rows.
+
+    An error after the first chunk is logged and re-raised, which aborts the
+    chunked response instead of ending it as if the export were complete.
+    """
+    buffer = io.StringIO()
+    buffer.write("\ufeff")  # Lets Excel read the file as UTF-8
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+    rows = 0
+    try:
+        async for appointment in appointments:
+            writer.writerow(export_row(appointment))
+            rows += 1
+            if rows % CSV_ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception as e:
+        logger.error(f"❌ CSV export failed after {rows} appointments: {e}")
+        raise
+
+    yield buffer.getvalue().encode("utf-8")
+    logger.info(f"📤 Exported {rows} appointments as CSV")
+
+
+async def build_xlsx(appointments: AsyncIterator[Appointment]) -> str:
+    """
+    Write the xlsx export to a temporary file and return its path.
+
+    A write-only workbook spools rows to disk as they arrive, so memory stays
+    flat however many appointments match.  The file is complete before anything
+    is sent, so a failure here can still be reported as an error response.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Service Appointments")
+    ws.append(EXPORT_HEADERS)
+
+    fd, export_file = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    loop = asyncio.get_running_loop()
+    rows = 0
+    try:
+        async for appointment in appointments:
+            ws.append(export_row(appointment))
+            rows += 1
+    except Exception as e:
+        logger.error(f"❌ xlsx export failed after {rows} appointments: {e}")
+        # Saving is also what closes and removes openpyxl's spool file
+        await loop.run_in_executor(None, wb.save, export_file)
+        os.remove(export_file)
+        raise
+    try:
+        await loop.run_in_executor(None, wb.save, export_file)
+    except Exception:
+        os.remove(export_file)
+        raise
+    logger.info(f"📤 Exported {rows} appointments as xlsx")
+    return export_file
+
+
+async def stream_file(export_file: str) -> AsyncIterator[bytes]:
+    """Send a finished export in XLSX_CHUNK_SIZE pieces and delete it, also when the download is abandoned"""
+    loop = asyncio.get_running_loop()
+    try:
+        with open(export_file, "rb") as export:
+            while True:
+                chunk = await loop.run_in_executor(None, export.read, XLSX_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(export_file)
@@ -3,13 +3,15 @@ Enhanced Database Service for Automotive Service Call Transcripts
 """
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 from .models import (
-    CallSession, TranscriptEntry,
-    call_session_to_dict, transcript_entry_to_dict,
-    dict_to_call_session, dict_to_transcript_entry
+    CallSession, TranscriptEntry, CallRetry, Appointment,
+    call_session_to_dict, transcript_entry_to_dict, call_retry_to_dict, appointment_to_dict,
+    dict_to_call_session, dict_to_transcript_entry, dict_to_call_retry, dict_to_appointment
 )
+from customers.phone_index import normalize_phone_number
 from settings import settings
 
 logger = logging.getLogger(__name__)
@@ -46,6 +48,7 @@ class DatabaseService:
             await self.database.call_sessions.create_index("call_id", unique=True)
             await self.database.call_sessions.create_index("started_at")
             await self.database.call_sessions.create_index("customer_phone")  # Updated field name
+            await self.database.call_sessions.create_index("customer_phone_key")  # Normalized phone lookups
             await self.database.call_sessions.create_index([("started_at", -1)])  # Recent calls first
 
             # Transcripts indexes
@@ -60,6 +63,18 @@ class DatabaseService:
             await self.database.call_sessions.create_index("car_model")  # Filter by car model
             await self.database.call_sessions.create_index("service_type")  # Filter by service type
 
+            # Outbound call retry queue indexes
+            await self.database.call_retries.create_index("retry_id", unique=True)
+            await self.database.call_retries.create_index("next_attempt_at")  # Due retries first
+
+            # Customer contact markers indexes
+            await self.database.customer_contacts.create_index("customer_key", unique=True)
+
+            # Appointments indexes
+            await self.database.appointments.create_index("appointment_id", unique=True)
+            await self.database.appointments.create_index("call_id")  # Link back to the call session
+            await self.database.appointments.create_index([("appointment_date", 1), ("booked_at", 1)])  # Date-range exports
+
             logger.info("✅ Database indexes created successfully")
         except Exception as e:
             logger.warning(f"⚠️ Failed to create some indexes: {e}")
@@ -114,9 +129,10 @@ class DatabaseService:
     async def get_calls_by_phone(self, phone_number: str, limit: int = 10) -> List[CallSession]:
         """Get call history for a specific customer phone number"""
         try:
-            # Search in both old and new field names for backwards compatibility
+            # Match on the normalized key, plus raw old and new field names for older documents
             cursor = self.database.call_sessions.find({
                 "$or": [
+                    {"customer_phone_key": normalize_phone_number(phone_number)},
                     {"customer_phone": phone_number},
                     {"patient_phone": phone_number}  # For backwards compatibility
                 ]
@@ -132,7 +148,8 @@ class DatabaseService:
             return []
 
     # Transcript Operations
-    async def save_transcript(self, call_id: str, speaker: str, message: str) -> TranscriptEntry:
+    async def save_transcript(self, call_id: str, speaker: str, message: str,
+                              timestamp: datetime = None) -> TranscriptEntry:
         """Save a transcript entry"""
         try:
             entry = TranscriptEntry(
@@ -140,6 +157,8 @@ class DatabaseService:
                 speaker=speaker,
                 message=message
             )
+            if timestamp:
+                entry.timestamp = timestamp  # When it was said, not when the write ran
 
             await self.database.transcripts.insert_one(transcript_entry_to_dict(entry))
             logger.info(f"✅ Saved transcript entry for automotive call: {call_id}")
@@ -309,6 +328,142 @@ class DatabaseService:
             logger.error(f"❌ Failed to cleanup old data: {e}")
             return {"error": str(e)}
 
+    # Call Retry Queue Operations
+    async def save_call_retry(self, retry: CallRetry) -> bool:
+        """Insert or replace a queued call retry"""
+        try:
+            await self.database.call_retries.replace_one(
+                {"retry_id": retry.retry_id},
+                call_retry_to_dict(retry),
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to save call retry {retry.retry_id}: {e}")
+            return False
+
+    async def claim_due_call_retries(self, lease_until: datetime, limit: int = 50,
+                                     exclude: Iterable[str] = ()) -> List[CallRetry]:
+        """
+        Take call retries that are due, pushing their next_attempt_at to lease_until.
+
+        The lease keeps another poll from claiming the same retry while it is being
+        dialed; if the process dies the retry simply becomes due again.  Retries in
+        exclude (already handed to the dialer) are never claimed.
+        """
+        retries = []
+        try:
+            now = datetime.utcnow()
+            while len(retries) < limit:
+                retry_data = await self.database.call_retries.find_one_and_update(
+                    {"next_attempt_at": {"$lte": now}, "retry_id": {"$nin": list(exclude)}},
+                    {"$set": {"next_attempt_at": lease_until}},
+                    sort=[("next_attempt_at", 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if not retry_data:
+                    break
+                retries.append(dict_to_call_retry(retry_data))
+        except Exception as e:
+            logger.error(f"❌ Failed to claim due call retries: {e}")
+        return retries
+
+    async def renew_call_retry_leases(self, retry_ids: List[str], lease_until: datetime) -> bool:
+        """Extend the lease of retries that are still waiting in the dialer"""
+        try:
+            await self.database.call_retries.update_many(
+                {"retry_id": {"$in": retry_ids}},
+                {"$set": {"next_attempt_at": lease_until}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to renew call retry leases: {e}")
+            return False
+
+    async def delete_call_retry(self, retry_id: str) -> bool:
+        """Remove a call retry once it is dialed or abandoned"""
+        try:
+            result = await self.database.call_retries.delete_one({"retry_id": retry_id})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"❌ Failed to delete call retry {retry_id}: {e}")
+            return False
+
+    async def count_call_retries(self) -> int:
+        """Number of call retries waiting in the queue"""
+        try:
+            return await self.database.call_retries.count_documents({})
+        except Exception as e:
+            logger.error(f"❌ Failed to count call retries: {e}")
+            return 0
+
+    # Customer Contact Operations
+    async def mark_customer_called(self, customer_key: str, called_at: datetime = None) -> bool:
+        """Record that a campaign call to the customer was placed"""
+        try:
+            await self.database.customer_contacts.update_one(
+                {"customer_key": customer_key},
+                {"$set": {"last_called_at": called_at or datetime.utcnow()}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to mark customer {customer_key} as called: {e}")
+            return False
+
+    async def mark_customer_booked(self, customer_key: str, booked_at: datetime = None) -> bool:
+        """Record that the customer booked a service appointment"""
+        try:
+            await self.database.customer_contacts.update_one(
+                {"customer_key": customer_key},
+                {"$set": {"booked_at": booked_at or datetime.utcnow()}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to mark customer {customer_key} as booked: {e}")
+            return False
+
+    async def get_customer_contacts(self, customer_keys: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """last_called_at/booked_at markers by customer key; None if they could not be read"""
+        try:
+            cursor = self.database.customer_contacts.find({"customer_key": {"$in": customer_keys}}, {"_id": 0})
+            return {contact["customer_key"]: contact async for contact in cursor}
+        except Exception as e:
+            logger.error(f"❌ Failed to get customer contacts: {e}")
+            return None
+
+    # Appointment Operations
+    async def save_appointment(self, appointment: Appointment) -> bool:
+        """Store an appointment booked on a call"""
+        try:
+            await self.database.appointments.insert_one(appointment_to_dict(appointment))
+            logger.info(f"✅ Saved appointment {appointment.appointment_id} for call: {appointment.call_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to save appointment for call {appointment.call_id}: {e}")
+            return False
+
+    async def iter_appointments(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                batch_size: int = 500) -> AsyncIterator[Appointment]:
+        """
+        Appointments ordered by appointment date, fetched from the cursor in batches.
+
+        start_date and end_date are inclusive ISO dates; with either set, appointments
+        without a date are left out.
+        """
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date
+        if end_date:
+            date_filter["$lte"] = end_date
+        query = {"appointment_date": date_filter} if date_filter else {}
+
+        cursor = self.database.appointments.find(query, {"_id": 0}) \
+            .sort([("appointment_date", 1), ("booked_at", 1)]).batch_size(batch_size)
+        async for data in cursor:
+            yield dict_to_appointment(data)
+
     async def update_call_session(self, call_id: str, updates: Dict[str, Any]) -> bool:
         """Update a call session with new information"""
         try:
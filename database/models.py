@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 import uuid
 
+from customers.phone_index import normalize_phone_number
+
 
 class CallSession(BaseModel):
     """Service call session model - represents each unique customer service call"""
@@ -38,6 +40,33 @@ class TranscriptEntry(BaseModel):
         }
 
 
+class CallRetry(BaseModel):
+    """Failed outbound call waiting to be dialed again"""
+    retry_id: str = Field(default_factory=lambda: f"retry_{uuid.uuid4().hex}")
+    customer_record: Dict[str, Any]
+    service_type: Optional[str] = None
+    attempts: int = 0  # Failed originations so far
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Appointment(BaseModel):
+    """Service appointment booked on a call"""
+    appointment_id: str = Field(default_factory=lambda: f"appt_{uuid.uuid4().hex}")
+    call_id: str  # CallSession the booking was made on
+    customer_name: str
+    customer_phone: str
+    car_model: Optional[str] = None
+    service_type: Optional[str] = None
+    address: Optional[str] = None
+    appointment_date: Optional[str] = None  # ISO date, e.g. 2025-06-21
+    appointment_time: Optional[str] = None  # 24h range, e.g. 10:00-11:00
+    time_slot: Optional[str] = None
+    confirmation_transcript: Optional[str] = None
+    booked_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # Conversion helpers for MongoDB compatibility
 def call_session_to_dict(session: CallSession) -> Dict[str, Any]:
     """Convert CallSession to dictionary for MongoDB storage"""
@@ -45,6 +74,7 @@ def call_session_to_dict(session: CallSession) -> Dict[str, Any]:
         "call_id": session.call_id,
         "customer_name": session.customer_name,  # Updated field name
         "customer_phone": session.customer_phone,  # Updated field name
+        "customer_phone_key": normalize_phone_number(session.customer_phone),  # For caller/history lookups
         "started_at": session.started_at,
         "car_model": getattr(session, 'car_model', None),
         "service_type": getattr(session, 'service_type', None)
@@ -62,6 +92,39 @@ def transcript_entry_to_dict(entry: TranscriptEntry) -> Dict[str, Any]:
     }
 
 
+def call_retry_to_dict(retry: CallRetry) -> Dict[str, Any]:
+    """Convert CallRetry to dictionary for MongoDB storage"""
+    return {
+        "retry_id": retry.retry_id,
+        "customer_record": retry.customer_record,
+        "customer_phone_key": normalize_phone_number(retry.customer_record.get("phone_number")),
+        "service_type": retry.service_type,
+        "attempts": retry.attempts,
+        "next_attempt_at": retry.next_attempt_at,
+        "last_error": retry.last_error,
+        "created_at": retry.created_at
+    }
+
+
+def appointment_to_dict(appointment: Appointment) -> Dict[str, Any]:
+    """Convert Appointment to dictionary for MongoDB storage"""
+    return {
+        "appointment_id": appointment.appointment_id,
+        "call_id": appointment.call_id,
+        "customer_name": appointment.customer_name,
+        "customer_phone": appointment.customer_phone,
+        "customer_phone_key": normalize_phone_number(appointment.customer_phone),
+        "car_model": appointment.car_model,
+        "service_type": appointment.service_type,
+        "address": appointment.address,
+        "appointment_date": appointment.appointment_date,
+        "appointment_time": appointment.appointment_time,
+        "time_slot": appointment.time_slot,
+        "confirmation_transcript": appointment.confirmation_transcript,
+        "booked_at": appointment.booked_at
+    }
+
+
 def dict_to_call_session(data: Dict[str, Any]) -> CallSession:
     """Convert dictionary from MongoDB to CallSession"""
     # Handle both old format (patient_*) and new format (customer_*) for backwards compatibility
@@ -93,3 +156,34 @@ def dict_to_transcript_entry(data: Dict[str, Any]) -> TranscriptEntry:
         message=data["message"],
         timestamp=data["timestamp"]
     )
+
+
+def dict_to_call_retry(data: Dict[str, Any]) -> CallRetry:
+    """Convert dictionary from MongoDB to CallRetry"""
+    return CallRetry(
+        retry_id=data["retry_id"],
+        customer_record=data["customer_record"],
+        service_type=data.get("service_type"),
+        attempts=data.get("attempts", 0),
+        next_attempt_at=data["next_attempt_at"],
+        last_error=data.get("last_error"),
+        created_at=data.get("created_at") or data["next_attempt_at"]
+    )
+
+
+def dict_to_appointment(data: Dict[str, Any]) -> Appointment:
+    """Convert dictionary from MongoDB to Appointment"""
+    return Appointment(
+        appointment_id=data["appointment_id"],
+        call_id=data["call_id"],
+        customer_name=data.get("customer_name", "Unknown Customer"),
+        customer_phone=data.get("customer_phone", "Unknown"),
+        car_model=data.get("car_model"),
+        service_type=data.get("service_type"),
+        address=data.get("address"),
+        appointment_date=data.get("appointment_date"),
+        appointment_time=data.get("appointment_time"),
+        time_slot=data.get("time_slot"),
+        confirmation_transcript=data.get("confirmation_transcript"),
+        booked_at=data["booked_at"]
+    )
@@ -1,23 +1,45 @@
 import json
 import base64
 from typing import Optional
-import plivo
-from plivo import plivoxml
 import websockets
 from fastapi import FastAPI, WebSocket, Request, Form, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.websockets import WebSocketDisconnect
 import asyncio
 
-from database.models import call_session_to_dict, transcript_entry_to_dict
+from database.models import Appointment, CallSession, call_session_to_dict, transcript_entry_to_dict
+from database.appointment_export import EXPORT_FORMATS, build_xlsx, stream_csv, stream_file
+from customers.record_store import CustomerRecordStore, load_customer_records
+from customers.due_index import DueDateIndex, service_type_for_row
+from customers.eligibility import classify_service_types, eligible_rows, service_type_name
+from customers.record_cache import read_record_cache, workbook_fingerprint, write_record_cache
+from customers.record_watcher import CustomerRecordWatcher
+from customers.phone_index import PhoneIndex, customer_key
+from calls.appointment_extraction import extract_appointment
+from calls.appointment_sink import AppointmentWorkbookSink
+from calls.answer_xml import answer_xml, incoming_call_xml, voice_language, voice_xml
+from calls.booking_detector import BookingConfirmationDetector
+from calls.call_context import CallContext
+from calls.call_registry import CALL_UUID_HEADER, call_registry
+from calls.audio_pacer import OutboundAudioPacer
+from calls.inbound_batcher import InboundAudioBatcher
+from calls.side_effects import SideEffectPipeline
+from calls.silence_suppressor import SilenceSuppressor
+from calls.plivo_client import AsyncPlivoClient, PlivoAPIError
+from calls.concurrency_controller import AdaptiveConcurrencyController
+from calls.dialer import OutboundDialer
+from calls.greeting_cache import GreetingAudioCache, greeting_text, render_speech
+from calls.campaign_scheduler import CampaignScheduler, parse_calling_windows
+from calls.rate_limiter import CallRateLimiter
+from calls.realtime_endpoints import (RealtimeEndpoint, RealtimeEndpointBalancer, TELEMETRY_EVENT_TYPES,
+                                      parse_realtime_endpoints)
+from calls.realtime_pool import RealtimeSessionPool
+from calls.retry_queue import CallRetryQueue
 from settings import settings
 import uvicorn
 import warnings
-import openpyxl
-from openpyxl import Workbook
 import os
-from datetime import datetime, timedelta
-import re
+from datetime import date, datetime, timedelta
 
 # MongoDB imports
 from database.db_service import db_service
@@ -27,17 +49,25 @@ warnings.filterwarnings("ignore")
 from dotenv import load_dotenv
 
 load_dotenv()
-records = []
-p_index = 0
-current_calling_customer = None  # Track the customer being called
-
-# Global variable to store conversation transcripts
-conversation_transcript = []
-
-# Global variable to store current call session
-current_call_session = None
-
-plivo_client = plivo.RestClient(settings.PLIVO_AUTH_ID, settings.PLIVO_AUTH_TOKEN)
+records = CustomerRecordStore()
+due_index = DueDateIndex()  # Customers ordered by the day they become due for service
+phone_index = PhoneIndex()  # Normalized phone number -> customer rows
+
+# Transcript saves, dashboard broadcasts and bookings, kept off the audio loop
+side_effects = SideEffectPipeline(workers=settings.SIDE_EFFECT_WORKERS,
+                                  max_queue_size=settings.SIDE_EFFECT_QUEUE_SIZE)
+# Sole writer of the appointments workbook, backed by an append-only journal
+appointment_sink = AppointmentWorkbookSink(settings.SERVICE_APPOINTMENTS_FILE,
+                                           settings.SERVICE_APPOINTMENTS_JOURNAL_FILE,
+                                           batch_size=settings.APPOINTMENT_FLUSH_BATCH_SIZE,
+                                           flush_interval=settings.APPOINTMENT_FLUSH_INTERVAL_SECONDS)
+
+# Dial eligible customers as soon as the server is up (set by main())
+campaign_on_startup = False
+
+plivo_client = AsyncPlivoClient(settings.PLIVO_AUTH_ID, settings.PLIVO_AUTH_TOKEN,
+                               pool_size=settings.PLIVO_HTTP_POOL_SIZE,
+                               timeout=settings.PLIVO_HTTP_TIMEOUT_SECONDS)
 
 # Configuration
 OPENAI_API_KEY = settings.AZURE_OPENAI_API_KEY_P
@@ -53,6 +83,8 @@ LOG_EVENT_TYPES = [
     'session.created', 'conversation.item.input_audio_transcription.completed'
 ]
 SHOW_TIMING_MATH = False
+STREAM_START_TIMEOUT = 15  # Seconds /media-stream waits for Plivo's start event
+APPOINTMENTS_SIDE_EFFECT_KEY = "appointments"  # Keeps appointment bookings in order
 app = FastAPI()
 
 not_registered_user_msg = "Sorry, we couldn't find your registered number. If you need any assistance, feel free to reach out. Thank you for calling, and have a great day!"
@@ -64,284 +96,199 @@ if not OPENAI_API_KEY:
 def read_customer_records(filename=None):
     """Read customer records with automotive data"""
     global records
-    records = []
 
     if filename is None:
         filename = settings.CUSTOMER_RECORDS_FILE
 
     if not os.path.exists(filename):
         print(f"⚠️ Customer records file '{filename}' not found. Please run generate_sample_data.py first.")
+        records = CustomerRecordStore()
+        due_index.build(records)
+        phone_index.build(records)
         return
 
-    wb = openpyxl.load_workbook(filename)
-    ws = wb.active
+    cache_file = settings.CUSTOMER_RECORDS_CACHE_FILE
+    fingerprint = workbook_fingerprint(filename)
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[0] is None:  # Skip empty rows
-            continue
+    # Build the new store completely before swapping it in
+    store = read_record_cache(fingerprint, cache_file) if cache_file else None
+    if store is not None:
+        print(f"⚡ Workbook unchanged, using cached customer records from {cache_file}")
+    else:
+        store = load_customer_records(filename)
+        if cache_file:
+            write_record_cache(store, fingerprint, cache_file)
 
-        record = {
-            "name": row[0],
-            "phone_number": row[1],
-            "address": row[2],
-            "car_model": row[3],
-            "car_delivery_date": row[4],
-            "last_servicing_date": row[5] if len(row) > 5 and row[5] else None,
-        }
-        records.append(record)
+    records = store
+    due_index.build(records)
+    phone_index.build(records)
 
     print(f"✅ Loaded {len(records)} customer records from {filename}")
 
 
-def determine_service_type(record):
-    """Determine if customer needs 1st or 2nd servicing"""
-    today = datetime.now().date()
-
-    # Parse delivery date
-    if isinstance(record["car_delivery_date"], str):
-        try:
-            delivery_date = datetime.strptime(record["car_delivery_date"], "%Y-%m-%d").date()
-        except ValueError:
-            print(f"⚠️ Invalid delivery date format for {record['name']}: {record['car_delivery_date']}")
-            return None
-    else:
-        # If it's already a datetime object, convert to date
-        delivery_date = record["car_delivery_date"].date() if isinstance(record["car_delivery_date"], datetime) else \
-            record["car_delivery_date"]
-
-    # Calculate days since delivery
-    days_since_delivery = (today - delivery_date).days
+def build_customer_indexes(store):
+    """Due-date and phone indexes for a freshly loaded store (runs in a worker thread)"""
+    new_due_index = DueDateIndex()
+    new_due_index.build(store)
+    new_phone_index = PhoneIndex()
+    new_phone_index.build(store)
+    return new_due_index, new_phone_index
 
-    # If no last servicing date, check if 30+ days since delivery for 1st service
-    if not record["last_servicing_date"]:
-        if days_since_delivery >= settings.SERVICE_REMINDER_DAYS:
-            return "first_service"
-    else:
-        # Parse last servicing date
-        if isinstance(record["last_servicing_date"], str):
-            try:
-                last_service_date = datetime.strptime(record["last_servicing_date"], "%Y-%m-%d").date()
-            except ValueError:
-                print(f"⚠️ Invalid last service date format for {record['name']}: {record['last_servicing_date']}")
-                return None
-        else:
-            # If it's already a datetime object, convert to date
-            last_service_date = record["last_servicing_date"].date() if isinstance(record["last_servicing_date"],
-                                                                                   datetime) else record[
-                "last_servicing_date"]
 
-        # Check if 9+ months since last service
-        months_since_service = (today - last_service_date).days / 30.44  # Average days per month
-        if months_since_service >= settings.REGULAR_SERVICE_MONTHS:
-            return "second_service"
+def swap_customer_records(new_store, indexes):
+    """
+    Replace the live records with a hot-reloaded store.
 
-    return None
+    The indexes were already built off the event loop; here the store and both
+    indexes are swapped in one step, so requests see either the old or the new
+    customer list.
+    """
+    global records
+    new_due_index, new_phone_index = indexes
+    previous_count = len(records)
+    records = new_store
+    due_index.adopt(new_due_index)
+    phone_index.adopt(new_phone_index)
 
+    print(f"🔄 Customer records updated: {previous_count} -> {len(records)} customers")
 
-def get_eligible_customers():
-    """Get list of customers eligible for service calls"""
-    eligible_customers = []
 
-    for i, record in enumerate(records):
-        service_type = determine_service_type(record)
-        if service_type:
-            eligible_customers.append({
-                "index": i,
-                "record": record,
-                "service_type": service_type
-            })
+def _eligible_customer_entry(row):
+    """Build the eligible customer entry for a store row"""
+    return {
+        "index": row,
+        "record": records[row],
+        "service_type": service_type_for_row(records, row)
+    }
 
-    return eligible_customers
 
+def plan_eligible_customers():
+    """Classify the whole customer base in one vectorized pass for campaign planning"""
+    service_codes = classify_service_types(records)
+    return [{
+        "index": row,
+        "record": records[row],
+        "service_type": service_type_name(service_codes[row])
+    } for row in eligible_rows(service_codes)]
+
+
+def record_customer_key(record):
+    """Customer key of a customer record dict"""
+    return customer_key(record.get("phone_number"), record.get("name"), record.get("car_model"))
+
+
+async def find_contacted_customers(keys):
+    """Customers called within CAMPAIGN_RECONTACT_DAYS, or who booked since they last became due"""
+    contacts = await db_service.get_customer_contacts(keys)
+    if contacts is None:
+        raise RuntimeError("customer contact markers could not be read")
+
+    recontact_after = datetime.utcnow() - timedelta(days=settings.CAMPAIGN_RECONTACT_DAYS)
+    contacted = set()
+    for key, contact in contacts.items():
+        called_at, booked_at = contact.get("last_called_at"), contact.get("booked_at")
+        if called_at and called_at >= recontact_after:
+            contacted.add(key)
+        elif booked_at:
+            customer = find_due_customer(key)
+            if customer is None or booked_at.date().toordinal() >= due_index.due_date_ordinal(customer["index"]):
+                contacted.add(key)
+    return contacted
+
+
+def find_due_customer(key):
+    """Eligible customer entry for a customer key, or None"""
+    phone_key = key.split("|", 1)[0]
+    row = next((row for row in phone_index.lookup(phone_key)
+                if phone_index.customer_key(row) == key and due_index.is_eligible(row)), None)
+    return _eligible_customer_entry(row) if row is not None else None
+
+
+def find_customer_by_phone(phone_number):
+    """Find a customer and their current service type by phone number"""
+    rows = phone_index.lookup(phone_number)
+    if not rows:
+        return None
 
-def get_current_customer_info():
-    """Get current customer being called with proper indexing"""
-    global current_calling_customer
+    # Prefer a registration that is currently due for service
+    eligible_row = next((row for row in rows if due_index.is_eligible(row)), None)
+    row = eligible_row if eligible_row is not None else rows[0]
+    return {
+        "customer_record": records[row],
+        "service_type": service_type_for_row(records, row) if eligible_row is not None else None
+    }
 
-    if current_calling_customer:
-        return current_calling_customer
 
-    eligible_customers = get_eligible_customers()
+def with_call_context(url, context):
+    """Append the call context id to a callback or stream URL"""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}call_context={context.context_id}"
 
-    # Current customer is the one at p_index (0-based for first call)
-    current_index = p_index
 
-    if current_index < len(eligible_customers):
-        current_calling_customer = {
-            "customer_record": eligible_customers[current_index]['record'],
-            "service_type": eligible_customers[current_index]['service_type']
-        }
-        print(
-            f"🎯 Current customer: {current_calling_customer['customer_record']['name']} - {current_calling_customer['service_type']}")
-        return current_calling_customer
-    else:
-        print(f"⚠️ No customer found at index {current_index}")
-        return None
+def stream_extra_headers(context, **headers):
+    """extraHeaders for the Plivo Stream element, carrying the call key for /media-stream"""
+    if context:
+        headers["call_context"] = context.context_id
+        if context.call_uuid:
+            headers[CALL_UUID_HEADER] = context.call_uuid
+    return ",".join(f"{key}={value}" for key, value in headers.items())
 
 
-def extract_appointment_details_from_response(confirmation_transcript):
+def extract_appointment_details_from_response(confirmation_transcript, service_type=None):
     """
     Extract date and time information from the specific AI response that contains confirmation
 
     Args:
         confirmation_transcript (str): The specific AI response containing "बुक कर दी है"
+        service_type (str): Service type of the customer on this call
 
     Returns:
         dict: Extracted appointment details from that specific response only
     """
     print(f"🔍 Extracting from confirmation response: {confirmation_transcript}")
 
-    extracted_info = {
-        "appointment_date": None,
-        "appointment_time": None,
-        "time_slot": None,
-        "service_type": None,
+    # Single pass over the response; dates come back as ISO dates and times as 24h ranges
+    extracted_info = extract_appointment(confirmation_transcript)
+    if extracted_info["appointment_date"]:
+        print(f"📅 Found date in confirmation: {extracted_info['date_text']} -> {extracted_info['appointment_date']}")
+    if extracted_info["appointment_time"]:
+        print(f"⏰ Found time in confirmation: {extracted_info['time_text']} -> {extracted_info['appointment_time']}")
+
+    extracted_info.update({
+        # Service type comes from the customer on this call
+        "service_type": service_type,
         "confirmation_transcript": confirmation_transcript,
         "appointment_confirmed": True
-    }
-
-    # Enhanced date patterns - looking in the specific confirmation response
-    date_patterns = [
-        r'(\d{1,2}[-/]\d{1,2}[-/]\d{4})',  # DD-MM-YYYY or DD/MM/YYYY (21-06-2025)
-        r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # YYYY-MM-DD or YYYY/MM/DD
-        r'(\d{1,2}\s*\w+\s*\d{4})',  # DD Month YYYY (21 June 2025)
-        r'(\d{1,2}\s*\w+)',  # DD Month (current year assumed)
-    ]
-
-    # Enhanced time slot patterns - looking in the specific confirmation response
-    time_patterns = [
-        r'(सुबह\s*\d{1,2}:\d{2})',  # सुबह 10:00
-        r'(दोपहर\s*\d{1,2}:\d{2})',  # दोपहर 2:00
-        r'(शाम\s*\d{1,2}:\d{2})',  # शाम 4:00
-        r'(सुबह)',  # Morning
-        r'(दोपहर)',  # Afternoon
-        r'(शाम)',  # Evening
-        r'(रात)',  # Night
-        r'(\d{1,2}:\d{2})',  # HH:MM format
-        r'(\d{1,2}\s*बजे)',  # X o'clock in Hindi
-        r'(\d{1,2}\s*AM)',  # 10 AM
-        r'(\d{1,2}\s*PM)',  # 2 PM
-    ]
-
-    # Extract dates from the confirmation response only
-    for pattern in date_patterns:
-        matches = re.findall(pattern, confirmation_transcript, re.IGNORECASE)
-        if matches:
-            extracted_info["appointment_date"] = matches[0]  # Get the first (and likely only) date
-            print(f"📅 Found date in confirmation: {extracted_info['appointment_date']}")
-            break
-
-    # Extract time information from the confirmation response only
-    for pattern in time_patterns:
-        matches = re.findall(pattern, confirmation_transcript, re.IGNORECASE)
-        if matches:
-            extracted_info["appointment_time"] = matches[0]  # Get the first (and likely only) time
-            print(f"⏰ Found time in confirmation: {extracted_info['appointment_time']}")
-            break
-
-    # Determine time slot from Hindi words in the confirmation response
-    if 'सुबह' in confirmation_transcript:
-        extracted_info["time_slot"] = "सुबह (Morning)"
-    elif 'दोपहर' in confirmation_transcript:
-        extracted_info["time_slot"] = "दोपहर (Afternoon)"
-    elif 'शाम' in confirmation_transcript:
-        extracted_info["time_slot"] = "शाम (Evening)"
-    elif 'रात' in confirmation_transcript:
-        extracted_info["time_slot"] = "रात (Night)"
-
-    # If no specific time found, use time slot
-    if not extracted_info["appointment_time"] and extracted_info["time_slot"]:
-        extracted_info["appointment_time"] = extracted_info["time_slot"]
-
-    # Determine service type from current customer
-    current_customer_info = get_current_customer_info()
-    if current_customer_info:
-        extracted_info["service_type"] = current_customer_info['service_type']
+    })
 
     print(f"📊 Final extracted info from confirmation: {extracted_info}")
     return extracted_info
 
 
-def append_appointment_to_excel(appointment_details, customer_record, filename=None):
+def appointment_row(appointment_details, customer_record):
     """
-    Append appointment details to Excel file - Simplified version for automotive service
+    Appointments sheet row for a confirmed booking - Simplified version for automotive service
 
     Args:
         appointment_details (dict): Dictionary containing appointment info
         customer_record (dict): Dictionary containing customer info
-        filename (str): Excel filename to write to
-    """
-    if filename is None:
-        filename = settings.SERVICE_APPOINTMENTS_FILE
-
-    headers = [
-        "Customer Name",
-        "Phone Number",
-        "Car Model",
-        "Service Type",
-        "Appointment Date",
-        "Appointment Time",
-        "Address",
-         # Changed from "Conversation Extract" to be more specific
-    ]
 
-    try:
-        # Check if file exists
-        if os.path.exists(filename):
-            # Load existing workbook - THIS PRESERVES ALL EXISTING DATA
-            wb = openpyxl.load_workbook(filename)
-            ws = wb.active
-            print(f"📊 Loaded existing Excel file with {ws.max_row} rows of data")
-        else:
-            # Create new workbook with headers ONLY if file doesn't exist
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Service Appointments"
-
-            # Add headers
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-            print("📊 Created new Excel file with headers")
-
-        # Find the next empty row - THIS ENSURES NO OVERWRITING
-        next_row = ws.max_row + 1
-        print(f"📝 Appending data to row {next_row}")
-
-        # Prepare service type display
-        service_type_display = "First Service" if appointment_details.get(
-            'service_type') == "first_service" else "Regular Service"
-
-        # Get the specific confirmation transcript (not the entire conversation)
-        confirmation_response = appointment_details.get('confirmation_transcript',
-                                                        'No confirmation transcript available')
-
-        # Prepare data row
-        appointment_data = [
-            customer_record.get('name', 'Unknown'),
-            customer_record.get('phone_number', 'Unknown'),
-            customer_record.get('car_model', 'Unknown'),
-            service_type_display,
-            appointment_details.get('appointment_date', 'Date to be confirmed'),
-            appointment_details.get('appointment_time', 'Time to be confirmed'),
-            customer_record.get('address', 'Unknown'),
-        ]
-
-        # Add data to the next row
-        for col, value in enumerate(appointment_data, 1):
-            ws.cell(row=next_row, column=col, value=str(value))
-
-        # Save the workbook
-        wb.save(filename)
-        print(f"✅ Service appointment details saved to {filename} at row {next_row}")
-        print(
-            f"📋 Saved data: {customer_record.get('name')} - {appointment_details.get('appointment_date', 'TBC')} - {appointment_details.get('appointment_time', 'TBC')}")
-        return True
+    Returns:
+        list: Cell values in APPOINTMENT_HEADERS order
+    """
+    # Prepare service type display
+    service_type_display = "First Service" if appointment_details.get(
+        'service_type') == "first_service" else "Regular Service"
 
-    except Exception as e:
-        print(f"❌ Error saving service appointment details: {e}")
-        import traceback
-        print(f"🔍 Traceback: {traceback.format_exc()}")
-        return False
+    return [str(value) for value in (
+        customer_record.get('name', 'Unknown'),
+        customer_record.get('phone_number', 'Unknown'),
+        customer_record.get('car_model', 'Unknown'),
+        service_type_display,
+        appointment_details.get('appointment_date', 'Date to be confirmed'),
+        appointment_details.get('appointment_time', 'Time to be confirmed'),
+        customer_record.get('address', 'Unknown'),
+    )]
 
 
 @app.get("/", response_class=JSONResponse)
@@ -431,10 +378,25 @@ async def get_appointment_details():
 @app.get("/eligible-customers")
 async def get_eligible_customers_api():
     """API endpoint to get customers eligible for service"""
-    eligible = get_eligible_customers()
+    eligible = plan_eligible_customers()
     return JSONResponse(eligible)
 
 
+@app.get("/api/dialer-status")
+async def get_dialer_status():
+    """Get outbound dialer, rate limiter, retry, campaign and call registry counters"""
+    return {**outbound_dialer.get_stats(),
+            "rate_limiter": outbound_dialer.rate_limiter.get_stats(),
+            "retry_queue": outbound_dialer.retry_queue.get_stats(),
+            "campaign": campaign_scheduler.get_stats(),
+            "call_registry": call_registry.get_stats(),
+            "realtime_pool": realtime_pool.get_stats(),
+            "realtime_endpoints": realtime_endpoints.get_stats(),
+            "adaptive_concurrency": concurrency_controller.get_stats(),
+            "greeting_cache": greeting_cache.get_stats(),
+            "plivo_client": plivo_client.get_stats()}
+
+
 @app.get("/api/recent-calls")
 async def get_recent_calls():
     """Get recent call sessions"""
@@ -514,41 +476,64 @@ async def get_active_calls():
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
-@app.api_route("/webhook", methods=["GET", "POST"])
-def home(request: Request):
-    """Handle webhook for making calls to next eligible customer"""
-    global p_index, current_calling_customer
-    if request.method == "POST":
-        eligible_customers = get_eligible_customers()
-
-        if p_index < len(eligible_customers):
-            current_customer = eligible_customers[p_index]
-            # Set the current calling customer BEFORE making the call
-            current_calling_customer = {
-                "customer_record": current_customer['record'],
-                "service_type": current_customer['service_type']
-            }
+@app.get("/api/appointments/export")
+async def export_appointments(format: str = "xlsx", start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Download booked appointments as xlsx or CSV, optionally for an inclusive ISO date range"""
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status_code=400)
+    try:
+        # Normalized so "2025-6-1"-style values cannot slip past the ISO string comparison in Mongo
+        start_date = date.fromisoformat(start_date).isoformat() if start_date else None
+        end_date = date.fromisoformat(end_date).isoformat() if end_date else None
+    except ValueError:
+        return JSONResponse({"error": "start_date and end_date must be YYYY-MM-DD"}, status_code=400)
+    if start_date and end_date and start_date > end_date:
+        return JSONResponse({"error": "start_date must not be after end_date"}, status_code=400)
+
+    try:
+        appointments = db_service.iter_appointments(start_date=start_date, end_date=end_date)
+        if format == "xlsx":
+            content = stream_file(await build_xlsx(appointments))
+        else:
+            # Fetch the first chunk now, so a failing query is still reported as a 500
+            chunks = stream_csv(appointments)
+            first_chunk = await chunks.__anext__()
+            content = _prepend_chunk(first_chunk, chunks)
+        filename = f"appointments_{start_date or 'all'}_{end_date or 'all'}.{format}"
+        return StreamingResponse(content, media_type=EXPORT_FORMATS[format],
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
 
-            call_made = plivo_client.calls.create(
-                from_=settings.PLIVO_FROM_NUMBER,
-                to_=current_customer['record']['phone_number'],
-                answer_url=settings.PLIVO_ANSWER_XML,
-                answer_method='GET')
+async def _prepend_chunk(first_chunk, chunks):
+    yield first_chunk
+    async for chunk in chunks:
+        yield chunk
 
-            print(f"📞 Webhook POST request detected! Calling {current_customer['record']['name']} (Index: {p_index})")
-            p_index += 1
+
+@app.get("/api/side-effects-status")
+async def get_side_effects_status():
+    """Get transcript/broadcast pipeline depth and drop counters"""
+    return {**side_effects.get_stats(), "appointment_sink": appointment_sink.get_stats()}
+
+
+@app.api_route("/webhook", methods=["GET", "POST"])
+async def home(request: Request):
+    """Answer URL for dialer calls; a POST (re)starts the calling campaign"""
+    if request.method == "POST":
+        if start_calling_campaign():
+            print("📞 Webhook POST request detected! Starting calling campaign")
         else:
-            print("⚠️ No more eligible customers to call")
+            print("📞 Webhook POST request detected, calling campaign already running")
+
+    # Key the dialer's context by the CallUUID Plivo sends with the answer request
+    context = call_registry.get(request.query_params.get("call_context"))
+    if context:
+        call_registry.bind_call_uuid(context, request.query_params.get("CallUUID"))
 
-    xml_data = f'''<?xml version="1.0" encoding="UTF-8"?>
-    <Response>
-        <Speak>Please wait while we connect your call to the {settings.SERVICE_CENTER_NAME} AI Agent. OK you can start speaking.</Speak>
-        <Stream streamTimeout="86400" keepCallAlive="true" bidirectional="true" contentType="audio/x-mulaw;rate=8000" audioTrack="inbound" >
-            {settings.HOST_URL}/media-stream
-        </Stream>
-    </Response>
-    '''
-    return HTMLResponse(xml_data, media_type='application/xml')
+    # Pre-rendered XML, nothing else happens on the answer path
+    return HTMLResponse(answer_xml(stream_extra_headers(context)), media_type='application/xml')
 
 
 @app.api_route("/incoming-call", methods=["GET", "POST"])
@@ -558,144 +543,253 @@ async def handle_incoming_call(request: Request):
     caller_phone = form_data.get("From", "unknown")
     request.state.caller_phone = caller_phone
 
-    wss_host = settings.HOST_URL
-    http_host = wss_host.replace('wss://', 'https://')
-
-    response = plivoxml.ResponseElement()
-
-    get_input = plivoxml.GetInputElement() \
-        .set_action(f"{http_host}/voice") \
-        .set_method("POST") \
-        .set_input_type("dtmf") \
-        .set_redirect(True) \
-        .set_language(settings.SECONDARY_LANGUAGE) \
-        .set_num_digits(1)
-
-    get_input.add_speak(
-        content="To switch to Hindi, please press 5. To continue in English, press any other key.",
-        voice="Polly.Salli",
-        language=settings.SECONDARY_LANGUAGE
-    )
-
-    response.add(get_input)
-    response.add_speak(
-        content="No selection received. Continuing in English.",
-        voice="Polly.Salli",
-        language=settings.SECONDARY_LANGUAGE
-    )
+    # Give the media stream the caller's customer context straight away
+    caller_info = find_customer_by_phone(caller_phone)
+    if caller_info:
+        context = CallContext(caller_info['customer_record'], caller_info['service_type'], direction="inbound")
+        print(f"📲 Incoming call from {context.customer_name} ({caller_phone})")
+    else:
+        context = CallContext(None, None, direction="inbound")
+        print(f"📲 Incoming call from unregistered number {caller_phone}")
+    context.call_uuid = form_data.get("CallUUID")
+    call_registry.register(context)
 
-    return HTMLResponse('<?xml version="1.0" encoding="UTF-8"?>\n' + response.to_string(), media_type="application/xml")
+    return HTMLResponse(incoming_call_xml(settings.SECONDARY_LANGUAGE), media_type="application/xml")
 
 
 @app.post("/voice")
-async def voice_post(Digits: Optional[str] = Form(None)):
+async def voice_post(Digits: Optional[str] = Form(None), CallUUID: Optional[str] = Form(None)):
     """Handle the user's input"""
-    response = plivoxml.ResponseElement()
-    lang_code = settings.SECONDARY_LANGUAGE
-
-    if Digits == '5':
-        lang_code = 'hi-IN'
-        response.add(plivoxml.SpeakElement('नमस्ते, मैं आपकी कैसे मदद कर सकती हूँ?', language=lang_code))
-    else:
-        response.add(plivoxml.SpeakElement('Hello, How can I help you today?', language=lang_code))
+    lang_code = voice_language(Digits)
+    context = call_registry.get_by_call_uuid(CallUUID)
 
-    wss_host = settings.HOST_URL
-
-    stream = response.add(plivoxml.StreamElement(f'{wss_host}/media-stream', extraHeaders=f"lang_code={lang_code}",
-                                                 bidirectional=True,
-                                                 streamTimeout=86400,
-                                                 keepCallAlive=True,
-                                                 contentType="audio/x-mulaw;rate=8000",
-                                                 audioTrack="inbound"
-                                                 ))
-
-    return HTMLResponse('<?xml version="1.0" encoding="UTF-8"?>\n' + stream.to_string(), media_type="application/xml")
+    xml_data = voice_xml(lang_code, stream_extra_headers(context, lang_code=lang_code))
+    return HTMLResponse(xml_data, media_type="application/xml")
 
 
 @app.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
     """Handle WebSocket connections between Plivo and OpenAI"""
-    global conversation_transcript, current_call_session, current_calling_customer
-
     await websocket.accept()
 
-    # Get current customer info using the proper method
-    current_customer_info = get_current_customer_info()
+    # The start event carries the CallUUID (and our extraHeaders) that key the call context
+    start_event = await wait_for_stream_start(websocket)
+    if start_event is None:
+        print("⚠️ WebSocket: Stream closed before the start event")
+        return
 
-    if current_customer_info:
-        customer_record = current_customer_info['customer_record']
-        service_type = current_customer_info['service_type']
-        print(f"🎯 WebSocket: Using customer {customer_record['name']} with service type {service_type}")
+    context = call_registry.resolve_start_event(start_event)
+    if context:
+        print(f"🎯 WebSocket: Using customer {context.customer_name} with service type {context.service_type}")
     else:
         # Fallback for unknown customer
-        customer_record = {"name": "Unknown Customer", "phone_number": "Unknown", "car_model": "Unknown"}
-        service_type = None
+        context = CallContext(None, None, direction="unknown")
+        context.stream_id = start_event['start'].get('streamId')
         print("⚠️ WebSocket: Using fallback customer data")
 
-    # Create new call session in MongoDB - Updated field names
-    current_call_session = await db_service.create_call_session(
-        customer_name=customer_record.get("name", "Unknown Customer"),  # Changed from patient_name
-        customer_phone=customer_record.get("phone_number", "Unknown"),  # Changed from patient_phone
-        car_model=customer_record.get("car_model"),
-        service_type=service_type
+    context.mark_answered()
+    try:
+        await bridge_call_audio(websocket, context)
+    finally:
+        # Frees the dialer slot held by this call
+        context.mark_finished()
+        call_registry.remove(context)
+
+
+async def wait_for_stream_start(websocket: WebSocket):
+    """Read Plivo events until the stream start event arrives"""
+    try:
+        while True:
+            message = await asyncio.wait_for(websocket.receive_text(), timeout=STREAM_START_TIMEOUT)
+            data = json.loads(message)
+            if data.get('event') == 'start':
+                return data
+    except (asyncio.TimeoutError, WebSocketDisconnect, json.JSONDecodeError):
+        return None
+
+
+async def record_call_started(context: CallContext):
+    """Store the call session and announce it on the dashboard (side-effect pipeline job)"""
+    session = context.call_session
+    customer_record = context.customer_record
+    await db_service.create_call_session(
+        customer_name=session.customer_name,
+        customer_phone=session.customer_phone,
+        call_id=session.call_id,
+        car_model=session.car_model,
+        service_type=session.service_type
     )
 
     # Broadcast call started status - Updated to use customer fields
     await websocket_manager.broadcast_call_status(
-        call_id=current_call_session.call_id,
+        call_id=session.call_id,
         status="started",
-        patient_name=current_call_session.customer_name,  # Uses customer_name now
+        patient_name=session.customer_name,  # Uses customer_name now
         car_model=customer_record.get("car_model"),
-        service_type=service_type,
-        phone_number=current_call_session.customer_phone  # Uses customer_phone now
+        service_type=context.service_type,
+        phone_number=session.customer_phone  # Uses customer_phone now
     )
 
     # Broadcast customer info to dashboard
     await websocket_manager.broadcast_customer_info(
-        call_id=current_call_session.call_id,
+        call_id=session.call_id,
         customer_data=customer_record
     )
 
-    user_details = None
 
-    async with websockets.connect(
-            OPENAI_API_ENDPOINT,
-            extra_headers={"api-key": OPENAI_API_KEY},
-            ping_timeout=20,
-            close_timeout=10
-    ) as realtime_ai_ws:
-        await initialize_session(realtime_ai_ws, user_details)
+async def record_transcript(context: CallContext, speaker: str, message: str, timestamp: datetime):
+    """Store one transcript line and push it to the dashboard (side-effect pipeline job)"""
+    call_id = context.call_session.call_id
+    await db_service.save_transcript(call_id=call_id, speaker=speaker, message=message, timestamp=timestamp)
+    await websocket_manager.broadcast_transcript(
+        call_id=call_id,
+        speaker=speaker,
+        message=message,
+        timestamp=timestamp.isoformat(),
+        car_model=context.customer_record.get("car_model"),
+        service_type=context.service_type
+    )
+
+
+async def record_appointment_confirmation(context: CallContext, transcript: str):
+    """Extract and save a confirmed appointment (side-effect pipeline job)"""
+    # Extract appointment details ONLY from this specific confirmation response
+    current_details = extract_appointment_details_from_response(transcript, context.service_type)
+    print(f"📋 Extracted details from confirmation: {current_details}")
 
-        stream_sid = None
-        latest_media_timestamp = 0
-        last_assistant_item = None
-        mark_queue = []
-        response_start_timestamp_twilio = None
+    # Only registered customers are written to the appointments sheet
+    if not context.is_known_customer:
+        print(f"⚠️ No customer info available for Excel save")
+        return
+
+    current_customer_record = context.customer_record
+
+    # Booked customers are not called again until they next become due
+    key = record_customer_key(current_customer_record)
+    await db_service.mark_customer_booked(key)
+    due_index.discard([row for row in phone_index.lookup(current_customer_record.get("phone_number"))
+                       if phone_index.customer_key(row) == key])
+
+    # MongoDB is the system of record, so the booking is saved there whatever happens to the workbook
+    saved_to_db = await db_service.save_appointment(Appointment(
+        call_id=context.call_session.call_id,
+        customer_name=current_customer_record.get("name", "Unknown Customer"),
+        customer_phone=current_customer_record.get("phone_number", "Unknown"),
+        car_model=current_customer_record.get("car_model"),
+        service_type=context.service_type,
+        address=current_customer_record.get("address"),
+        appointment_date=current_details.get("appointment_date"),
+        appointment_time=current_details.get("appointment_time"),
+        time_slot=current_details.get("time_slot"),
+        confirmation_transcript=transcript
+    ))
+
+    # Workbook copy, durable once journaled; the sink adds it to the workbook with the next batch
+    saved_to_workbook = False
+    try:
+        await appointment_sink.record(appointment_row(current_details, current_customer_record))
+        saved_to_workbook = True
+    except Exception as e:
+        print(f"❌ Failed to add appointment to {settings.SERVICE_APPOINTMENTS_FILE}: {e}")
+    if not (saved_to_db or saved_to_workbook):
+        return
+    print(f"✅ APPOINTMENT SAVED!")
+
+    # Broadcast appointment confirmation
+    await websocket_manager.broadcast_appointment_confirmation(
+        call_id=context.call_session.call_id,
+        customer_name=current_customer_record.get("name"),
+        appointment_date=current_details.get("appointment_date", "To be confirmed"),
+        appointment_time=current_details.get("appointment_time", "To be confirmed"),
+        car_model=current_customer_record.get("car_model"),
+        service_type=context.service_type or "Service"
+    )
+
+
+async def bridge_call_audio(websocket: WebSocket, context: CallContext):
+    """Bridge one call's audio between Plivo and OpenAI"""
+    customer_record = context.customer_record
+    service_type = context.service_type
+
+    # New call session - Updated field names; stored once the greeting is playing
+    current_call_session = CallSession(
+        customer_name=customer_record.get("name", "Unknown Customer"),  # Changed from patient_name
+        customer_phone=customer_record.get("phone_number", "Unknown"),  # Changed from patient_phone
+        car_model=customer_record.get("car_model"),
+        service_type=service_type
+    )
+    context.call_session = current_call_session
+    conversation_transcript = context.conversation_transcript
+
+    stream_sid = context.stream_id
+    print(f"📞 Incoming stream has started {stream_sid}")
+    last_assistant_item = None
+
+    # Plays the assistant's audio in fixed, paced frames and tracks how much was heard
+    audio_pacer = OutboundAudioPacer(websocket.send_text, stream_sid,
+                                     frame_ms=settings.OUTBOUND_AUDIO_FRAME_MS,
+                                     lead_ms=settings.OUTBOUND_AUDIO_LEAD_MS)
+    audio_pacer.start()
+
+    # Open with the pre-rendered greeting right away; the model takes over from the caller's reply
+    greeting = greeting_text(context.customer_name) \
+        if settings.GREETING_CACHE_ENABLED and context.is_known_customer else None
+    greeting_audio = greeting_cache.get(greeting) if greeting else None
+    if greeting_audio:
+        audio_pacer.push_audio(greeting_audio)
+        audio_pacer.flush()
+
+    # Keyed by call so the session is stored before any of the call's transcript lines
+    if not side_effects.submit_required(current_call_session.call_id, record_call_started, context):
+        await record_call_started(context)
+
+    # Usually already connected and configured - warmed when the dialer originated the call
+    try:
+        realtime_ai_ws = await realtime_pool.acquire(context.context_id)
+    except Exception as e:
+        concurrency_controller.observe_connection_error(e)
+        await audio_pacer.stop()
+        raise
+    try:
+        await initialize_session(realtime_ai_ws, context, greeting if greeting_audio else None)
+
+        # Sends the caller's audio to OpenAI in batches instead of one message per 20 ms frame
+        inbound_batcher = InboundAudioBatcher(realtime_ai_ws.send,
+                                              max_delay_ms=settings.INBOUND_AUDIO_BATCH_MAX_DELAY_MS,
+                                              max_bytes=settings.INBOUND_AUDIO_BATCH_MAX_BYTES)
+        # Keeps long silences off the realtime connection, with hangover and padding for server VAD
+        silence_suppressor = SilenceSuppressor(threshold_dbfs=settings.SILENCE_THRESHOLD_DBFS,
+                                               hangover_ms=settings.SILENCE_HANGOVER_MS,
+                                               padding_ms=settings.SILENCE_PADDING_MS) \
+            if settings.SILENCE_SUPPRESSION_ENABLED else None
+        # Catches the booking confirmation while the AI is still saying it
+        booking_detector = BookingConfirmationDetector()
 
         async def receive_from_twilio():
-            nonlocal stream_sid, latest_media_timestamp
+            nonlocal stream_sid
             try:
                 async for message in websocket.iter_text():
                     data = json.loads(message)
                     if data['event'] == 'media' and realtime_ai_ws.open:
-                        latest_media_timestamp = int(data['media']['timestamp'])
-                        audio_append = {
-                            "type": "input_audio_buffer.append",
-                            "audio": data['media']['payload']
-                        }
-                        await realtime_ai_ws.send(json.dumps(audio_append))
+                        if silence_suppressor:
+                            audio = silence_suppressor.process(base64.b64decode(data['media']['payload']))
+                            await inbound_batcher.add_audio(audio)
+                        else:
+                            await inbound_batcher.add(data['media']['payload'])
                     elif data['event'] == 'start':
+                        await inbound_batcher.flush()
                         stream_sid = data['start']['streamId']
                         print(f"📞 Incoming stream has started {stream_sid}")
                         await realtime_ai_ws.send(json.dumps(data))
-                        response_start_timestamp_twilio = None
-                        latest_media_timestamp = 0
-                        last_assistant_item = None
+                        audio_pacer.clear()
+                        audio_pacer.stream_id = stream_sid
                     elif data['event'] == 'mark':
-                        if mark_queue:
-                            mark_queue.pop(0)
+                        audio_pacer.on_mark(data.get('mark', {}).get('name'))
+                    elif data['event'] == 'stop' and realtime_ai_ws.open:
+                        await inbound_batcher.flush()
             except WebSocketDisconnect:
                 print("📞 Client disconnected.")
+                inbound_batcher.discard()
                 if realtime_ai_ws.open:
                     await realtime_ai_ws.close()
 
@@ -709,149 +803,95 @@ async def handle_media_stream(websocket: WebSocket):
                     )
 
         async def send_to_twilio():
-            nonlocal stream_sid, last_assistant_item, response_start_timestamp_twilio
+            nonlocal stream_sid, last_assistant_item
             try:
                 async for openai_message in realtime_ai_ws:
                     response = json.loads(openai_message)
 
+                    # Rate limits and errors feed the health score of this session's endpoint
+                    if response.get('type') in TELEMETRY_EVENT_TYPES:
+                        realtime_endpoints.record_event(realtime_ai_ws, response)
+                        concurrency_controller.observe_event(response)
+
                     # Handle user transcription - UNIFIED HANDLING
                     if response.get('type') == 'conversation.item.input_audio_transcription.completed':
-                        try:
-                            print(f"🎤 RAW TRANSCRIPTION RESPONSE: {response}")
-                            user_transcript = response.get('transcript', '').strip()
-
-                            if user_transcript:
-                                print(f"👤 Customer said: {user_transcript}")
-
-                                # Store user transcript in MongoDB and broadcast
-                                if current_call_session:
-                                    await db_service.save_transcript(
-                                        call_id=current_call_session.call_id,
-                                        speaker="user",
-                                        message=user_transcript
-                                    )
-
-                                    # Broadcast to WebSocket clients
-                                    await websocket_manager.broadcast_transcript(
-                                        call_id=current_call_session.call_id,
-                                        speaker="user",
-                                        message=user_transcript,
-                                        timestamp=datetime.utcnow().isoformat(),
-                                        car_model=customer_record.get("car_model"),
-                                        service_type=service_type
-                                    )
-
-                                # Add user transcript to global conversation for appointment detection
-                                conversation_transcript.append(user_transcript)
-
-                        except Exception as e:
-                            print(f"❌ Error processing user transcript: {e}")
+                        print(f"🎤 RAW TRANSCRIPTION RESPONSE: {response}")
+                        user_transcript = response.get('transcript', '').strip()
+
+                        if user_transcript:
+                            print(f"👤 Customer said: {user_transcript}")
+
+                            # Store in MongoDB and broadcast without holding up the audio
+                            side_effects.submit(current_call_session.call_id, record_transcript,
+                                                context, "user", user_transcript, datetime.utcnow())
+
+                            # Add user transcript to the call conversation for appointment detection
+                            conversation_transcript.append(user_transcript)
 
                     # Handle AI response transcription
                     elif response['type'] in LOG_EVENT_TYPES:
                         try:
-                            transcript = response['response']['output'][0]['content'][0]['transcript']
+                            output_item = response['response']['output'][0]
+                            transcript = output_item['content'][0]['transcript']
+                        except (KeyError, IndexError):
+                            print("⚠️ No transcript found in response")
+                        else:
                             print(f"🤖 AI Response: {transcript}")
 
-                            # Store AI response in MongoDB and broadcast
-                            if current_call_session:
-                                await db_service.save_transcript(
-                                    call_id=current_call_session.call_id,
-                                    speaker="ai",
-                                    message=transcript
-                                )
-
-                                # Broadcast to WebSocket clients
-                                await websocket_manager.broadcast_transcript(
-                                    call_id=current_call_session.call_id,
-                                    speaker="ai",
-                                    message=transcript,
-                                    timestamp=datetime.utcnow().isoformat(),
-                                    car_model=customer_record.get("car_model"),
-                                    service_type=service_type
-                                )
-
-                            # Add AI transcript to global conversation for appointment detection
-                            conversation_transcript.append(transcript)
+                            # Store in MongoDB and broadcast without holding up the audio
+                            side_effects.submit(current_call_session.call_id, record_transcript,
+                                                context, "ai", transcript, datetime.utcnow())
 
-                            # *** UPDATED APPOINTMENT DETECTION LOGIC ***
-                            # Check specifically for appointment confirmation keyword in THIS SPECIFIC RESPONSE
-                            if "बुक कर दी है" in transcript:
-                                print(f"🎯 APPOINTMENT CONFIRMATION DETECTED: {transcript}")
-
-                                # Extract appointment details ONLY from this specific confirmation response
-                                current_details = extract_appointment_details_from_response(transcript)
-                                print(f"📋 Extracted details from confirmation: {current_details}")
-
-                                # Get current customer info
-                                current_customer_info = get_current_customer_info()
-                                if current_customer_info:
-                                    current_customer_record = current_customer_info['customer_record']
-
-                                    # Save to Excel using the new function
-                                    success = append_appointment_to_excel(current_details, current_customer_record)
-
-                                    if success:
-                                        print(f"✅ APPOINTMENT SAVED TO EXCEL!")
-
-                                        # Broadcast appointment confirmation
-                                        await websocket_manager.broadcast_appointment_confirmation(
-                                            call_id=current_call_session.call_id,
-                                            customer_name=current_customer_record.get("name"),
-                                            appointment_date=current_details.get("appointment_date", "To be confirmed"),
-                                            appointment_time=current_details.get("appointment_time", "To be confirmed"),
-                                            car_model=current_customer_record.get("car_model"),
-                                            service_type=service_type or "Service"
-                                        )
-                                    else:
-                                        print(f"❌ Failed to save appointment to Excel")
-                                else:
-                                    print(f"⚠️ No customer info available for Excel save")
+                            # Add AI transcript to the call conversation for appointment detection
+                            conversation_transcript.append(transcript)
 
-                        except (KeyError, IndexError):
-                            print("⚠️ No transcript found in response")
+                            # Confirmations the streaming detector missed are caught on the full response
+                            confirmation = booking_detector.complete(output_item.get('id'), transcript)
+                            if confirmation:
+                                print(f"🎯 APPOINTMENT CONFIRMATION DETECTED: {confirmation}")
+                                if not side_effects.submit_required(APPOINTMENTS_SIDE_EFFECT_KEY,
+                                                                    record_appointment_confirmation,
+                                                                    context, confirmation):
+                                    await record_appointment_confirmation(context, confirmation)
+
+                    # Check the AI transcript for a booking confirmation as it streams in
+                    elif response.get('type') == 'response.audio_transcript.delta':
+                        confirmation = booking_detector.feed(response.get('item_id'), response.get('delta', ''))
+                        if confirmation:
+                            print(f"🎯 APPOINTMENT CONFIRMATION DETECTED (streaming): {confirmation}")
+                            if not side_effects.submit_required(APPOINTMENTS_SIDE_EFFECT_KEY,
+                                                                record_appointment_confirmation,
+                                                                context, confirmation):
+                                await record_appointment_confirmation(context, confirmation)
 
                     # Handle audio delta
                     elif response.get('type') == 'response.audio.delta' and 'delta' in response:
-                        audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
-                        audio_delta = {
-                            "event": "playAudio",
-                            "media": {
-                                "contentType": 'audio/x-mulaw',
-                                "sampleRate": 8000,
-                                "payload": audio_payload
-                            }
-                        }
-                        await websocket.send_json(audio_delta)
-
-                        if response_start_timestamp_twilio is None:
-                            response_start_timestamp_twilio = latest_media_timestamp
-                            if SHOW_TIMING_MATH:
-                                print(
-                                    f"⏱️ Setting start timestamp for new response: {response_start_timestamp_twilio}ms")
+                        audio_pacer.push(response['delta'], response.get('item_id'))
 
                         if response.get('item_id'):
                             last_assistant_item = response['item_id']
 
-                        await send_mark(websocket, stream_sid)
+                    # Play out the tail of the response as a short frame
+                    elif response.get('type') == 'response.audio.done':
+                        audio_pacer.flush()
 
                     # Handle speech started
                     elif response.get('type') == 'input_audio_buffer.speech_started':
                         print("🎙️ Speech started detected.")
-                        if last_assistant_item:
+                        if last_assistant_item or audio_pacer.is_playing():
                             print(f"⏸️ Interrupting response with id: {last_assistant_item}")
                             await handle_speech_started_event()
             except Exception as e:
                 print(f"❌ Error in send_to_twilio: {e}")
 
         async def handle_speech_started_event():
-            nonlocal response_start_timestamp_twilio, last_assistant_item
+            nonlocal last_assistant_item
             print("🔄 Handling speech started event.")
-            if mark_queue and response_start_timestamp_twilio is not None:
-                elapsed_time = latest_media_timestamp - response_start_timestamp_twilio
+            if audio_pacer.is_playing():
+                # Exactly what the caller heard of the item, by the pacer's playback clock
+                elapsed_time = audio_pacer.clear()
                 if SHOW_TIMING_MATH:
-                    print(
-                        f"⏱️ Calculating elapsed time for truncation: {latest_media_timestamp} - {response_start_timestamp_twilio} = {elapsed_time}ms")
+                    print(f"⏱️ Played {elapsed_time}ms of the interrupted response")
 
                 if last_assistant_item:
                     if SHOW_TIMING_MATH:
@@ -870,29 +910,106 @@ async def handle_media_stream(websocket: WebSocket):
                     "streamSid": stream_sid
                 })
 
-                mark_queue.clear()
                 last_assistant_item = None
-                response_start_timestamp_twilio = None
 
-        async def send_mark(connection, stream_sid):
-            if stream_sid:
-                mark_event = {
-                    "event": "mark",
-                    "streamSid": stream_sid,
-                    "mark": {"name": "responsePart"}
-                }
-                await connection.send_json(mark_event)
-                mark_queue.append('responsePart')
+        try:
+            await asyncio.gather(receive_from_twilio(), send_to_twilio())
+        finally:
+            await inbound_batcher.stop()
+            await audio_pacer.stop()
+            print(f"🔊 Outbound audio: {audio_pacer.get_stats()}, inbound audio: {inbound_batcher.get_stats()}")
+            if silence_suppressor:
+                print(f"🤫 Silence suppression: {silence_suppressor.get_stats()}")
+    finally:
+        await audio_pacer.stop()
+        await realtime_ai_ws.close()
+
+
+async def connect_realtime_endpoint(endpoint: RealtimeEndpoint):
+    """Connect a realtime AI websocket to one deployment"""
+    return await websockets.connect(
+        endpoint.url,
+        extra_headers={"api-key": endpoint.api_key},
+        ping_timeout=20,
+        close_timeout=10
+    )
+
+
+realtime_endpoints = RealtimeEndpointBalancer(
+    endpoints=[RealtimeEndpoint(OPENAI_API_ENDPOINT, OPENAI_API_KEY, settings.REALTIME_ENDPOINT_MAX_SESSIONS)]
+    + parse_realtime_endpoints(settings.REALTIME_EXTRA_ENDPOINTS, settings.REALTIME_ENDPOINT_MAX_SESSIONS),
+    connect=connect_realtime_endpoint,
+    connect_timeout=settings.REALTIME_CONNECT_TIMEOUT_SECONDS
+)
+
+
+async def open_realtime_session():
+    """Connect a realtime AI websocket on the least loaded healthy deployment"""
+    return await realtime_endpoints.open_session()
+
+
+async def configure_realtime_session(realtime_ai_ws):
+    """Send the session settings shared by every call; instructions follow per customer"""
+    session_update = {
+        "type": "session.update",
+        "session": {
+            "input_audio_transcription": {
+                "model": "whisper-1",
+                "language": settings.PRIMARY_LANGUAGE,
+            },
+            "turn_detection": {"type": "server_vad"},
+            "input_audio_format": "g711_ulaw",
+            "output_audio_format": "g711_ulaw",
+            "voice": VOICE,
+            "modalities": ["text", "audio"],
+            "temperature": 0.7,
+        }
+    }
+    await realtime_ai_ws.send(json.dumps(session_update))
+
 
-        await asyncio.gather(receive_from_twilio(), send_to_twilio())
+realtime_pool = RealtimeSessionPool(
+    open_session=open_realtime_session,
+    configure_session=configure_realtime_session,
+    idle_size=settings.REALTIME_POOL_IDLE_SESSIONS,
+    max_idle_age=settings.REALTIME_POOL_MAX_IDLE_SECONDS,
+    reservation_timeout=settings.DIALER_ANSWER_TIMEOUT_SECONDS + 30
+)
 
 
-async def send_initial_conversation_item(realtime_ai_ws, user_details=None):
+async def synthesize_greeting_audio(text: str) -> bytes:
+    """Render a greeting in the call voice on a short-lived realtime session"""
+    realtime_ai_ws = await open_realtime_session()
+    try:
+        await configure_realtime_session(realtime_ai_ws)
+        return await render_speech(realtime_ai_ws, text)
+    finally:
+        await realtime_ai_ws.close()
+
+
+greeting_cache = GreetingAudioCache(
+    synthesize=synthesize_greeting_audio,
+    max_entries=settings.GREETING_CACHE_SIZE,
+    concurrency=settings.GREETING_RENDER_CONCURRENCY
+)
+
+
+async def send_initial_conversation_item(realtime_ai_ws, context: CallContext, played_greeting: Optional[str] = None):
     """Send initial conversation item with personalized greeting"""
-    current_customer_info = get_current_customer_info()
+    if played_greeting:
+        # The caller already heard the cached greeting; record it and wait for their reply
+        await realtime_ai_ws.send(json.dumps({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": played_greeting}]
+            }
+        }))
+        return
 
-    if current_customer_info:
-        current_customer = current_customer_info['customer_record']
+    if context.is_known_customer:
+        current_customer = context.customer_record
         greeting_name = current_customer.get("name", "Sir/Madam")
     else:
         greeting_name = "Sir/Madam"
@@ -913,53 +1030,49 @@ async def send_initial_conversation_item(realtime_ai_ws, user_details=None):
     await realtime_ai_ws.send(json.dumps({"type": "response.create"}))
 
 
-async def initialize_session(realtime_ai_ws, user_details=None):
-    """Control initial session with OpenAI"""
-    current_customer_info = get_current_customer_info()
+def _record_date(value):
+    """Date of a customer record date cell, or None when it is missing or not a valid date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            return None
+    return None
 
-    if current_customer_info:
-        current_customer = current_customer_info['customer_record']
-        service_type = current_customer_info['service_type']
 
-        # Calculate service timing info
-        today = datetime.now().date()
-        if isinstance(current_customer["car_delivery_date"], str):
-            delivery_date = datetime.strptime(current_customer["car_delivery_date"], "%Y-%m-%d").date()
-        else:
-            delivery_date = current_customer["car_delivery_date"]
-            if isinstance(delivery_date, datetime):
-                delivery_date = delivery_date.date()
+async def initialize_session(realtime_ai_ws, context: CallContext, played_greeting: Optional[str] = None):
+    """Control initial session with OpenAI"""
+    if context.is_known_customer:
+        current_customer = context.customer_record
+        service_type = context.service_type
 
-        days_since_delivery = (today - delivery_date).days
+        # Calculate service timing info; inbound callers may have missing or invalid dates
+        today = datetime.now().date()
+        delivery_date = _record_date(current_customer.get("car_delivery_date"))
+        last_service = _record_date(current_customer.get("last_servicing_date"))
 
         service_message = ""
         if service_type == "first_service":
-            service_message = f"This is their first service call. Their car was delivered {days_since_delivery} days ago."
+            service_message = "This is their first service call."
+            if delivery_date:
+                days_since_delivery = (today - delivery_date).days
+                service_message += f" Their car was delivered {days_since_delivery} days ago."
         else:
-            if current_customer["last_servicing_date"]:
-                if isinstance(current_customer["last_servicing_date"], str):
-                    last_service = datetime.strptime(current_customer["last_servicing_date"], "%Y-%m-%d").date()
-                else:
-                    last_service = current_customer["last_servicing_date"]
-                    if isinstance(last_service, datetime):
-                        last_service = last_service.date()
+            if last_service:
                 months_since_service = (today - last_service).days / 30.44
                 service_message = f"This is a regular service reminder. Their last service was {months_since_service:.1f} months ago."
     else:
         current_customer = {"name": "Customer", "car_model": ""}
         service_message = "This is a general service inquiry."
 
+    # Audio, voice and VAD settings were sent by configure_realtime_session when the session was opened
     session_update = {
         "type": "session.update",
         "session": {
-            "input_audio_transcription": {
-                "model": "whisper-1",
-                "language": settings.PRIMARY_LANGUAGE,
-            },
-            "turn_detection": {"type": "server_vad"},
-            "input_audio_format": "g711_ulaw",
-            "output_audio_format": "g711_ulaw",
-            "voice": VOICE,
             "instructions": f'''AI ROLE: Female voice representative from automotive service center
 LANGUAGE: Hindi (देवनागरी लिपि) 
 VOICE STYLE: Professional, friendly, helpful, feminine
@@ -971,7 +1084,7 @@ You are talking to {current_customer['name']}, who owns a {current_customer.get(
 
 CONVERSATION FLOW:
 
-"नमस्ते {current_customer['name']} जी, मैं Patni Toyota Nagpur से Priya बोल रही हूँ। आप कैसे हैं?"
+"{greeting_text(current_customer['name'])}"
 
 (रुकें, उत्तर सुनें)
 
@@ -1001,14 +1114,21 @@ IMPORTANT NOTES:
 - If they ask about service details, explain basic maintenance check
 - Always confirm appointment details clearly
 - Keep conversation natural and friendly''',
-            "modalities": ["text", "audio"],
-            "temperature": 0.7,
         }
     }
     print('📤 Sending session update:', json.dumps(session_update))
     await realtime_ai_ws.send(json.dumps(session_update))
 
-    await send_initial_conversation_item(realtime_ai_ws, user_details)
+    await send_initial_conversation_item(realtime_ai_ws, context, played_greeting)
+
+
+customer_records_watcher = CustomerRecordWatcher(
+    filename=settings.CUSTOMER_RECORDS_FILE,
+    build_indexes=build_customer_indexes,
+    on_reload=swap_customer_records,
+    interval=settings.CUSTOMER_RECORDS_RELOAD_INTERVAL,
+    cache_file=settings.CUSTOMER_RECORDS_CACHE_FILE
+)
 
 
 @app.on_event("startup")
@@ -1021,65 +1141,149 @@ async def startup_event():
 
     # Start WebSocket manager periodic tasks
     await websocket_manager.start_periodic_tasks()
+    await side_effects.start()
+    await appointment_sink.start()
+    await realtime_pool.start()
+
+    # Pick up edits to the customer workbook without a restart
+    if settings.CUSTOMER_RECORDS_RELOAD_INTERVAL > 0:
+        await customer_records_watcher.start()
+
+    await outbound_dialer.start()
+    await outbound_dialer.retry_queue.start(campaign_scheduler.submit_retry, campaign_scheduler.next_calling_time,
+                                            outbound_dialer.free_slots)
+    if settings.ADAPTIVE_CONCURRENCY_ENABLED:
+        await concurrency_controller.start()
+    if campaign_on_startup:
+        start_calling_campaign()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
+    await campaign_scheduler.stop()
+    await concurrency_controller.stop()
+    await outbound_dialer.retry_queue.stop()
+    await outbound_dialer.stop()
+    await customer_records_watcher.stop()
+    await plivo_client.close()
+    await side_effects.stop()
+    await appointment_sink.stop()
+    await realtime_pool.close()
+    await greeting_cache.close()
     await db_service.disconnect()
     print("👋 Application shutdown complete")
 
 
-def make_next_call():
-    """Make a call to the next eligible customer"""
-    global p_index, current_calling_customer
+async def originate_call(context: CallContext):
+    """Place the Plivo call for a dialer call context"""
+    # Connect the realtime AI session while the phone rings
+    realtime_pool.reserve(context.context_id)
+    try:
+        call_made = await plivo_client.create_call(
+            from_=settings.PLIVO_FROM_NUMBER,
+            to_=context.customer_record['phone_number'],
+            answer_url=with_call_context(settings.PLIVO_ANSWER_XML, context),
+            answer_method='GET',
+            ring_timeout=int(settings.DIALER_ANSWER_TIMEOUT_SECONDS)
+        )
+    except Exception:
+        await realtime_pool.cancel(context.context_id)
+        raise
+    context.request_uuid = call_made.get("request_uuid")
+    await db_service.mark_customer_called(record_customer_key(context.customer_record))
 
-    eligible_customers = get_eligible_customers()
+    service_display = "First Service" if context.service_type == "first_service" else "Regular Service"
+    print(f"📞 Called {context.customer_name} for {service_display}")
 
-    if p_index < len(eligible_customers):
-        current_customer = eligible_customers[p_index]
 
-        # Set the current calling customer BEFORE making the call
-        current_calling_customer = {
-            "customer_record": current_customer['record'],
-            "service_type": current_customer['service_type']
-        }
+async def abandon_unanswered_call(context):
+    """Hang up a call the customer did not answer in time and drop its realtime reservation"""
+    await realtime_pool.cancel(context.context_id)
+    try:
+        if context.call_uuid:
+            await plivo_client.hangup_call(context.call_uuid)
+        elif context.request_uuid:
+            await plivo_client.hangup_request(context.request_uuid)
+    except PlivoAPIError as e:
+        if e.status != 404:  # 404: the call already ended on its own
+            raise
+
+
+async def admit_queued_call(context):
+    """Dial a queued call only inside a calling window; otherwise it waits for the next one"""
+    if campaign_scheduler.in_calling_window():
+        return True
 
-        try:
-            call_made = plivo_client.calls.create(
-                from_=settings.PLIVO_FROM_NUMBER,
-                to_=current_customer['record']['phone_number'],
-                answer_url=settings.PLIVO_ANSWER_XML,
-                answer_method='GET'
-            )
+    # A fresh call is released again by the next window, a retry is kept in Mongo until then
+    campaign_scheduler.withdraw(record_customer_key(context.customer_record), retry=context.retry_id is not None)
+    if context.retry_id:
+        await outbound_dialer.retry_queue.defer(context)
+    print(f"⏰ Calling window closed, not dialing {context.customer_name} now")
+    return False
+
+
+outbound_dialer = OutboundDialer(
+    originate=originate_call,
+    max_concurrent_calls=settings.MAX_CONCURRENT_CALLS,
+    answer_timeout=settings.DIALER_ANSWER_TIMEOUT_SECONDS,
+    max_call_duration=settings.DIALER_MAX_CALL_SECONDS,
+    rate_limiter=CallRateLimiter(
+        calls_per_second=settings.OUTBOUND_CALLS_PER_SECOND,
+        burst=settings.OUTBOUND_CALL_BURST,
+        max_concurrent_calls=settings.MAX_CONCURRENT_CALLS
+    ),
+    retry_queue=CallRetryQueue(
+        max_attempts=settings.CALL_RETRY_MAX_ATTEMPTS,
+        base_delay=settings.CALL_RETRY_BASE_DELAY_SECONDS,
+        max_delay=settings.CALL_RETRY_MAX_DELAY_SECONDS
+    ),
+    admit=admit_queued_call,
+    abandon=abandon_unanswered_call
+)
 
-            service_display = "First Service" if current_customer[
-                                                     'service_type'] == "first_service" else "Regular Service"
-            print(f"📞 Called {current_customer['record']['name']} for {service_display} (Index: {p_index})")
 
-            # Increment index for next call
-            p_index += 1
+async def queue_customer_call(customer_record, service_type, retry=None):
+    """Queue a customer with the dialer, rendering their greeting while they wait"""
+    if settings.GREETING_CACHE_ENABLED:
+        greeting_cache.prefetch(greeting_text(customer_record.get("name") or "Customer"))
+    return await outbound_dialer.submit(customer_record, service_type, retry)
 
-            return True
 
-        except Exception as e:
-            print(f"❌ Failed to make call to {current_customer['record']['name']}: {e}")
-            return False
-    else:
-        print("⚠️ No more eligible customers to call")
-        return False
+# Tunes the dialer's concurrent-call cap to the realtime API's remaining budget
+concurrency_controller = AdaptiveConcurrencyController(
+    rate_limiter=outbound_dialer.rate_limiter,
+    min_limit=settings.MIN_CONCURRENT_CALLS,
+    max_limit=settings.MAX_CONCURRENT_CALLS,
+    headroom=settings.ADAPTIVE_CONCURRENCY_HEADROOM,
+    increase_interval=settings.ADAPTIVE_CONCURRENCY_INCREASE_SECONDS
+)
+
+
+campaign_scheduler = CampaignScheduler(
+    due_index=due_index,
+    customer_keys=phone_index.customer_keys,
+    find_customer=find_due_customer,
+    submit=queue_customer_call,
+    windows=parse_calling_windows(settings.CALLING_WINDOWS),
+    utc_offset_minutes=settings.CALLING_TIMEZONE_OFFSET_MINUTES,
+    daily_quota=settings.DAILY_CALL_QUOTA,
+    release_spacing=settings.CAMPAIGN_RELEASE_SPACING_SECONDS,
+    find_contacted=find_contacted_customers
+)
+
+
+def start_calling_campaign():
+    """Start releasing eligible customers to the dialer unless a campaign is already running"""
+    return campaign_scheduler.start()
 
 
 def main():
-    global p_index, current_calling_customer
+    global campaign_on_startup
 
     print(f"🚗 Starting {settings.SERVICE_CENTER_NAME} AI Service Call System")
     print("=" * 60)
 
-    # Reset global variables
-    p_index = 0
-    current_calling_customer = None
-
     # Read customer records
     read_customer_records()
 
@@ -1088,17 +1292,17 @@ def main():
         return
 
     # Get eligible customers for service
-    eligible_customers = get_eligible_customers()
+    eligible_customers = plan_eligible_customers()
     print(f"📊 Found {len(eligible_customers)} customers eligible for service calls:")
     for i, customer in enumerate(eligible_customers):
         service_display = "First Service" if customer['service_type'] == "first_service" else "Regular Service"
         print(f"   {i + 1}. {customer['record']['name']}: {service_display} ({customer['record']['car_model']})")
 
     if eligible_customers:
-        print(f"\n📞 Making first call to {eligible_customers[0]['record']['name']}...")
-        success = make_next_call()
-        if not success:
-            print("❌ Failed to make initial call")
+        print(f"\n📞 Calling up to {settings.MAX_CONCURRENT_CALLS} customers at a time "
+              f"during calling windows {settings.CALLING_WINDOWS}, "
+              f"starting with {eligible_customers[0]['record']['name']}...")
+        campaign_on_startup = True
     else:
         print("⚠️ No customers eligible for service calls at this time")
 
@@ -12,10 +12,15 @@ class Settings(BaseSettings):
     PLIVO_FROM_NUMBER: str
     PLIVO_TO_NUMBER: str
     PLIVO_ANSWER_XML: str
+    PLIVO_HTTP_POOL_SIZE: int = 10  # Keep-alive connections shared by call originations
+    PLIVO_HTTP_TIMEOUT_SECONDS: float = 15  # Timeout for one Plivo REST request
 
     # Azure OpenAI Settings
     AZURE_OPENAI_API_KEY_P: str
     AZURE_OPENAI_API_ENDPOINT_P: str
+    REALTIME_ENDPOINT_MAX_SESSIONS: int = 20  # Concurrent sessions allowed on the deployment above
+    REALTIME_EXTRA_ENDPOINTS: str = ""  # More deployments as "wss-url|api-key|max_sessions", separated by ";"
+    REALTIME_CONNECT_TIMEOUT_SECONDS: float = 10  # Slower connections fail over to the next deployment
 
     # Server Settings
     HOST_URL: str
@@ -30,9 +35,58 @@ class Settings(BaseSettings):
     SERVICE_REMINDER_DAYS: int = 30  # Days after delivery for first service
     REGULAR_SERVICE_MONTHS: int = 9  # Months for regular service reminder
 
+    # Outbound Dialer Settings
+    MAX_CONCURRENT_CALLS: int = 5  # Outbound calls kept in flight at once
+    DIALER_ANSWER_TIMEOUT_SECONDS: float = 90  # Release the slot if the media stream never connects
+    DIALER_MAX_CALL_SECONDS: float = 1800  # Safety limit on how long one call holds a slot
+    OUTBOUND_CALLS_PER_SECOND: float = 1  # Origination rate allowed by the carrier
+    OUTBOUND_CALL_BURST: int = 2  # Originations allowed back to back before the rate applies
+    CALL_RETRY_MAX_ATTEMPTS: int = 4  # Originations tried per customer before giving up
+    CALL_RETRY_BASE_DELAY_SECONDS: float = 60  # First retry delay, doubled on every failure
+    CALL_RETRY_MAX_DELAY_SECONDS: float = 3600  # Upper bound on the retry delay
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = True  # Adjust concurrent calls to the realtime rate-limit budget
+    MIN_CONCURRENT_CALLS: int = 1  # Floor for the adaptive limit; MAX_CONCURRENT_CALLS is the ceiling
+    ADAPTIVE_CONCURRENCY_HEADROOM: float = 0.2  # Back off when less than this fraction of the budget is left
+    ADAPTIVE_CONCURRENCY_INCREASE_SECONDS: float = 30  # Calm period before allowing one more concurrent call
+
+    # Campaign Scheduling Settings
+    CALLING_WINDOWS: str = "10:00-13:00,15:00-19:00"  # Local times customers may be called
+    CALLING_TIMEZONE_OFFSET_MINUTES: int = 330  # Local time offset from UTC (IST)
+    DAILY_CALL_QUOTA: int = 200  # Customers and retries released to the dialer per day, 0 for no limit
+    CAMPAIGN_RELEASE_SPACING_SECONDS: float = 20  # Gap between customers released into the dialer
+    CAMPAIGN_RECONTACT_DAYS: int = 7  # Days before a customer who was called but did not book is called again
+
     # Excel File Settings
     CUSTOMER_RECORDS_FILE: str = "Customer_Records.xlsx"
     SERVICE_APPOINTMENTS_FILE: str = "Service_Appointments.xlsx"
+    SERVICE_APPOINTMENTS_JOURNAL_FILE: str = "Service_Appointments.journal"  # Bookings are recorded here first
+    APPOINTMENT_FLUSH_BATCH_SIZE: int = 20  # Journaled bookings written to the workbook at once
+    APPOINTMENT_FLUSH_INTERVAL_SECONDS: float = 5  # Longest a booking waits for its workbook batch
+    CUSTOMER_RECORDS_CACHE_FILE: str = ".customer_records.cache"  # Parsed records cache, empty to disable
+    CUSTOMER_RECORDS_RELOAD_INTERVAL: float = 30  # Seconds between workbook change checks, 0 to disable
+
+    # Call Audio Settings
+    OUTBOUND_AUDIO_FRAME_MS: int = 100  # Size of each audio frame sent to Plivo
+    OUTBOUND_AUDIO_LEAD_MS: int = 300  # How far audio may be sent ahead of playback
+    INBOUND_AUDIO_BATCH_MAX_DELAY_MS: int = 80  # Longest caller audio is held for batching, 0 to disable
+    INBOUND_AUDIO_BATCH_MAX_BYTES: int = 640  # Batch size that is sent without waiting (80 ms of mu-law)
+    SILENCE_SUPPRESSION_ENABLED: bool = True  # Hold back long silences instead of streaming them to OpenAI
+    SILENCE_THRESHOLD_DBFS: float = -45  # Frames quieter than this count as silence
+    SILENCE_HANGOVER_MS: int = 800  # Audio still sent after speech, longer than server VAD's silence window
+    SILENCE_PADDING_MS: int = 300  # Silence sent just before speech resumes (server VAD prefix padding)
+
+    # Background Processing Settings
+    SIDE_EFFECT_WORKERS: int = 4  # Tasks saving transcripts and broadcasting to the dashboard
+    SIDE_EFFECT_QUEUE_SIZE: int = 2000  # Jobs queued across all workers before transcript jobs are dropped
+
+    # Realtime AI Session Pool Settings
+    REALTIME_POOL_IDLE_SESSIONS: int = 2  # Warm sessions kept ready for calls without a reservation
+    REALTIME_POOL_MAX_IDLE_SECONDS: float = 300  # Idle sessions older than this are reopened
+
+    # Greeting Audio Cache Settings
+    GREETING_CACHE_ENABLED: bool = True  # Play pre-rendered opening lines as soon as the stream starts
+    GREETING_CACHE_SIZE: int = 500  # Rendered greetings kept, least recently used evicted first
+    GREETING_RENDER_CONCURRENCY: int = 2  # Greetings rendered at once ahead of the dial queue
 
     # AI Voice Settings
     AI_VOICE_NAME: str = "Priya"  # Name of the AI assistant